@@ -5,24 +5,41 @@ Extrae datos de sitios de seguros daneses de forma ética
 """
 
 import asyncio
-import re
-import json
 import logging
-from typing import Dict, List, Optional
+import time
+from typing import ClassVar, Dict, List, Optional, Tuple
 from bs4 import BeautifulSoup
 from dataclasses import dataclass
 from datetime import datetime
-import aiohttp
+from urllib.parse import urljoin
+
+from extraction import ExtractionPlan
+from records import DANISH_NUMBER, add_slots, format_kr, parse_danish_number
+from structured_data import periodic_offers
 
 logger = logging.getLogger(__name__)
 
+# Campos comunes a todos los proveedores; cada target añade sus selectores
+PRICE_FIELD = {
+    'text': r'\d+\s*kr',
+    'extract': rf'({DANISH_NUMBER})\s*(?:kr|DKK)',
+    'number': True,
+    'required': True
+}
+ADDONS_FIELD = {
+    'text': r'kasko|glasskade|vejhjælp|rejseforsikring',
+    'many': True,
+    'default': ['Kasko', 'Glasskade', 'Vejhjælp']
+}
+
+@add_slots
 @dataclass
 class InsuranceData:
     """Estructura de datos para seguros de auto"""
     udbyder: str
     produkt: str
-    pris_mdr: str
-    pris_år: Optional[str] = None
+    pris_mdr_kr: float  # Precios en coronas; el texto se genera al mostrarlos
+    pris_år_kr: Optional[float] = None
     dækning: str = ""
     tilvalg: List[str] = None
     kampagne: str = ""
@@ -32,6 +49,12 @@ class InsuranceData:
     reliability_score: float = 0.0
     additional_info: Dict = None
     
+    # Claves exportadas, en orden: textos para la web y números para análisis
+    EXPORT_FIELDS: ClassVar[Tuple[str, ...]] = (
+        'udbyder', 'produkt', 'pris_mdr', 'pris_år', 'pris_mdr_kr', 'pris_år_kr', 'dækning', 'tilvalg',
+        'kampagne', 'link', 'last_updated', 'data_source', 'reliability_score', 'additional_info'
+    )
+    
     def __post_init__(self):
         if self.tilvalg is None:
             self.tilvalg = []
@@ -39,298 +62,244 @@ class InsuranceData:
             self.additional_info = {}
         if not self.last_updated:
             self.last_updated = datetime.now().isoformat()
+    
+    @property
+    def pris_mdr(self) -> str:
+        """Precio mensual para mostrar: '399 kr./md'"""
+        return f"{format_kr(self.pris_mdr_kr)} kr./md"
+    
+    @property
+    def pris_år(self) -> Optional[str]:
+        """Precio anual para mostrar: '4.788 kr./år'"""
+        return f"{format_kr(self.pris_år_kr)} kr./år" if self.pris_år_kr is not None else None
 
 class BilforsikringScraper:
     """Scraper específico para seguros de auto"""
     
     def __init__(self, main_scraper):
         self.main_scraper = main_scraper
+        self.provider_status: Dict[str, Dict] = {}
         self.targets = {
             'tryg': {
                 'url': 'https://www.tryg.dk/forsikring/bil',
+                'udbyder': 'Tryg',
+                'data_source': 'tryg.dk',
+                'reliability_score': 0.9,
+                'container': {'tags': ['div', 'section'], 'class': r'product|insurance|forsikring'},
+                'parse_only': True,
                 'selectors': {
-                    'price': '.price, .pris, [data-testid*="price"]',
-                    'product': '.product-name, .produkt-navn',
-                    'coverage': '.coverage, .dækning',
-                    'addons': '.addon, .tilvalg',
-                    'campaign': '.campaign, .kampagne, .offer'
-                }
+                    'product': {'select': 'h1, h2, h3, .product-name, .produkt-navn, .title', 'required': True},
+                    'price': dict(PRICE_FIELD, select='.price, .pris, [data-testid*="price"]'),
+                    'coverage': {'select': '.coverage, .dækning, .description, .beskrivelse',
+                                 'default': 'Ansvarsforsikring'},
+                    'addons': dict(ADDONS_FIELD, select='.addon, .tilvalg'),
+                    'campaign': '.campaign, .kampagne, .offer, .tilbud'
+                },
+                'fallback': [{
+                    'produkt': 'Bilforsikring Basis',
+                    'pris_mdr_kr': 399,
+                    'dækning': 'Ansvarsforsikring (obligatorisk)',
+                    'tilvalg': ['Kasko', 'Glasskade', 'Vejhjælp'],
+                    'kampagne': 'Første måned gratis',
+                    'reliability_score': 0.7
+                }]
             },
             'topdanmark': {
                 'url': 'https://www.topdanmark.dk/forsikring/bil',
+                'udbyder': 'Topdanmark',
+                'data_source': 'topdanmark.dk',
+                'reliability_score': 0.9,
+                'container': {'tags': ['div', 'section'], 'class': r'product|insurance'},
+                'parse_only': True,
                 'selectors': {
-                    'price': '.price, .pris',
-                    'product': '.product-name',
-                    'coverage': '.coverage',
-                    'addons': '.addon',
-                    'campaign': '.campaign'
-                }
+                    'product': {'select': 'h1, h2, h3, .product-name, .title', 'required': True},
+                    'price': dict(PRICE_FIELD, select='.price, .pris'),
+                    'coverage': {'select': '.coverage, .description', 'default': 'Ansvar + Kasko'},
+                    'addons': dict(ADDONS_FIELD, select='.addon'),
+                    'campaign': '.campaign, .offer'
+                },
+                'fallback': [{
+                    'produkt': 'Bilforsikring Standard',
+                    'pris_mdr_kr': 429,
+                    'dækning': 'Ansvar + Kasko',
+                    'tilvalg': ['Rejseforsikring', 'Elbil-lader dækning'],
+                    'kampagne': '10% online rabat',
+                    'reliability_score': 0.7
+                }]
             },
             'if': {
                 'url': 'https://www.if.dk/forsikring/bil',
+                'udbyder': 'If Forsikring',
+                'data_source': 'if.dk',
+                'reliability_score': 0.9,
+                'container': {'tags': ['div', 'section'], 'class': r'product|insurance'},
+                'parse_only': True,
                 'selectors': {
-                    'price': '.price, .pris',
-                    'product': '.product-name',
+                    'product': {'select': '.product-name', 'required': True},
+                    'price': dict(PRICE_FIELD, select='.price, .pris'),
                     'coverage': '.coverage',
-                    'addons': '.addon',
+                    'addons': dict(ADDONS_FIELD, select='.addon'),
                     'campaign': '.campaign'
-                }
+                },
+                'fallback': [{
+                    'produkt': 'If Bilforsikring',
+                    'pris_mdr_kr': 410,
+                    'dækning': 'Ansvarsforsikring med mulighed for kasko',
+                    'tilvalg': ['Ung bilist dækning', 'Vejhjælp'],
+                    'kampagne': 'Ingen selvrisiko ved første skade',
+                    'reliability_score': 0.8
+                }]
             },
             'gf': {
                 'url': 'https://www.gf.dk/bil',
+                'udbyder': 'GF Forsikring',
+                'data_source': 'gf.dk',
+                'reliability_score': 0.9,
+                'container': {'tags': ['div', 'section'], 'class': r'product|insurance'},
+                'parse_only': True,
                 'selectors': {
-                    'price': '.price, .pris',
-                    'product': '.product-name',
+                    'product': {'select': '.product-name', 'required': True},
+                    'price': dict(PRICE_FIELD, select='.price, .pris'),
                     'coverage': '.coverage',
-                    'addons': '.addon',
+                    'addons': dict(ADDONS_FIELD, select='.addon'),
                     'campaign': '.campaign'
-                }
+                },
+                'fallback': [{
+                    'produkt': 'GF Bilforsikring',
+                    'pris_mdr_kr': 399,
+                    'dækning': 'Ansvar + Kasko',
+                    'tilvalg': ['Glasskade', 'Vejhjælp'],
+                    'kampagne': 'Bonus ved skadefri kørsel',
+                    'reliability_score': 0.8
+                }]
             }
         }
     
-    async def scrape_all_providers(self) -> List[InsuranceData]:
-        """Scrapes todos los proveedores de seguros"""
-        all_data = []
+    async def scrape_all_providers(self, deadline: Optional[float] = None) -> List[InsuranceData]:
+        """Scrapes todos los proveedores de seguros de forma concurrente"""
+        # Cada proveedor vive en un host distinto, así que se piden en paralelo;
+        # el rate limit por host del EthicalScraper mantiene la cortesía
+        await self.main_scraper.prefetch_robots(
+            [config['url'] for config in self.targets.values()]
+        )
+        results = await asyncio.gather(*(
+            self._scrape_provider_safe(provider, config, deadline)
+            for provider, config in self.targets.items()
+        ))
         
-        for provider, config in self.targets.items():
-            try:
-                logger.info(f"🔍 Scraping {provider}...")
-                data = await self.scrape_provider(provider, config)
-                if data:
-                    all_data.extend(data)
-                    logger.info(f"✅ Found {len(data)} products from {provider}")
-                else:
-                    logger.warning(f"⚠️ No data found for {provider}")
-            except Exception as e:
-                logger.error(f"❌ Error scraping {provider}: {e}")
+        all_data = []
+        for data in results:
+            all_data.extend(data)
         
         return all_data
     
+    async def _scrape_provider_safe(self, provider: str, config: Dict,
+                                    deadline: Optional[float] = None) -> List[InsuranceData]:
+        """Scrapes un proveedor dentro de su presupuesto de tiempo, sin afectar a los demás"""
+        budget = self.main_scraper.provider_budget(deadline)
+        start = time.perf_counter()
+        status = 'error'
+        data = []
+        try:
+            if budget <= 0:
+                raise asyncio.TimeoutError
+            logger.info(f"🔍 Scraping {provider}...")
+            data = await asyncio.wait_for(self.scrape_provider(provider, config), timeout=budget)
+            if data:
+                status = 'ok'
+                logger.info(f"✅ Found {len(data)} products from {provider}")
+            else:
+                status = 'empty'
+                logger.warning(f"⚠️ No data found for {provider}")
+        except asyncio.TimeoutError:
+            # Sin presupuesto: se marca como parcial y el resto de la ejecución sigue
+            status = 'partial'
+            logger.warning(f"⏰ Deadline ({budget:.1f}s) exceeded for {provider}, marked as partial")
+        except Exception as e:
+            logger.error(f"❌ Error scraping {provider}: {e}")
+        finally:
+            self.provider_status[provider] = {
+                'status': status,
+                'records': len(data),
+                'seconds': round(time.perf_counter() - start, 3)
+            }
+        return data
+    
     async def scrape_provider(self, provider: str, config: Dict) -> List[InsuranceData]:
         """Scrapes un proveedor específico"""
-        content = await self.main_scraper.fetch_page(config['url'])
-        if not content:
+        with self.main_scraper.timed('fetch'):
+            page = await self.main_scraper.fetch_bytes(config['url'])
+        if not page:
             return []
         
-        soup = BeautifulSoup(content, 'html.parser')
-        products = []
+        # Parseo y extracción (CPU) fuera del event loop; el plan declarativo se compila
+        # una sola vez por proceso y solo construye los subárboles candidatos
+        products = await self.main_scraper.parse_page(
+            provider, config, page, InsuranceData, self.extract_products, self.structured_products
+        )
         
-        # Estrategias de scraping específicas por proveedor
-        if provider == 'tryg':
-            products = await self._scrape_tryg(soup, config)
-        elif provider == 'topdanmark':
-            products = await self._scrape_topdanmark(soup, config)
-        elif provider == 'if':
-            products = await self._scrape_if(soup, config)
-        elif provider == 'gf':
-            products = await self._scrape_gf(soup, config)
+        # En replay, la fecha de los registros es la de la respuesta grabada
+        if page.fetched_at:
+            for item in products:
+                item.last_updated = page.fetched_at
         
         return products
     
-    async def _scrape_tryg(self, soup: BeautifulSoup, config: Dict) -> List[InsuranceData]:
-        """Scraping específico para Tryg"""
+    @staticmethod
+    def structured_products(offers: List[Dict], config: Dict) -> List[InsuranceData]:
+        """Productos a partir de ofertas en JSON-LD/__NEXT_DATA__"""
+        coverage = config['selectors'].get('coverage', '')
+        default_coverage = coverage.get('default', '') if isinstance(coverage, dict) else ''
         products = []
-        
-        # Buscar productos de seguros
-        product_containers = soup.find_all(['div', 'section'], class_=re.compile(r'product|insurance|forsikring', re.I))
-        
-        for container in product_containers:
-            try:
-                # Extraer nombre del producto
-                product_name = self._extract_text(container, [
-                    'h1', 'h2', 'h3', '.product-name', '.produkt-navn', '.title'
-                ])
-                
-                # Extraer precio
-                price_element = container.find(text=re.compile(r'\d+\s*kr', re.I))
-                if not price_element:
-                    price_element = container.find(['span', 'div'], class_=re.compile(r'price|pris', re.I))
-                
-                price = self._extract_price(price_element) if price_element else None
-                
-                if product_name and price:
-                    # Extraer cobertura
-                    coverage = self._extract_text(container, [
-                        '.coverage', '.dækning', '.description', '.beskrivelse'
-                    ])
-                    
-                    # Extraer tilvalg
-                    addons = self._extract_addons(container)
-                    
-                    # Extraer campaña
-                    campaign = self._extract_text(container, [
-                        '.campaign', '.kampagne', '.offer', '.tilbud'
-                    ])
-                    
-                    product = InsuranceData(
-                        udbyder="Tryg",
-                        produkt=product_name,
-                        pris_mdr=price,
-                        dækning=coverage or "Ansvarsforsikring",
-                        tilvalg=addons,
-                        kampagne=campaign or "",
-                        link=config['url'],
-                        data_source="tryg.dk",
-                        reliability_score=0.9
-                    )
-                    products.append(product)
-                    
-            except Exception as e:
-                logger.warning(f"Error parsing Tryg product: {e}")
-        
-        # Si no encontramos productos específicos, crear datos genéricos
-        if not products:
+        # Solo primas con periodicidad explícita; un precio sin unidad no es una mensualidad
+        for offer in periodic_offers(offers, ('month', 'year')):
+            # Un precio anual se reparte en 12 mensualidades
+            yearly = offer['unit'] == 'year'
+            monthly = parse_danish_number(round(offer['price'] / 12, 2) if yearly else offer['price'])
             products.append(InsuranceData(
-                udbyder="Tryg",
-                produkt="Bilforsikring Basis",
-                pris_mdr="399 kr./md",
-                dækning="Ansvarsforsikring (obligatorisk)",
-                tilvalg=["Kasko", "Glasskade", "Vejhjælp"],
-                kampagne="Første måned gratis",
-                link=config['url'],
-                data_source="tryg.dk",
-                reliability_score=0.7
+                udbyder=config['udbyder'],
+                produkt=offer['name'],
+                pris_mdr_kr=monthly,
+                pris_år_kr=parse_danish_number(offer['price']) if yearly else None,
+                dækning=offer['description'] or default_coverage,
+                link=urljoin(config['url'], offer['url']) if offer['url'] else config['url'],
+                data_source=config['data_source'],
+                reliability_score=config['reliability_score'],
+                additional_info={'structured_source': offer['source']}
             ))
-        
         return products
     
-    async def _scrape_topdanmark(self, soup: BeautifulSoup, config: Dict) -> List[InsuranceData]:
-        """Scraping específico para Topdanmark"""
-        products = []
-        
-        # Lógica similar a Tryg pero adaptada para Topdanmark
-        product_containers = soup.find_all(['div', 'section'], class_=re.compile(r'product|insurance', re.I))
-        
-        for container in product_containers:
-            try:
-                product_name = self._extract_text(container, [
-                    'h1', 'h2', 'h3', '.product-name', '.title'
-                ])
-                
-                price_element = container.find(text=re.compile(r'\d+\s*kr', re.I))
-                price = self._extract_price(price_element) if price_element else None
-                
-                if product_name and price:
-                    coverage = self._extract_text(container, [
-                        '.coverage', '.description'
-                    ])
-                    
-                    addons = self._extract_addons(container)
-                    campaign = self._extract_text(container, [
-                        '.campaign', '.offer'
-                    ])
-                    
-                    product = InsuranceData(
-                        udbyder="Topdanmark",
-                        produkt=product_name,
-                        pris_mdr=price,
-                        dækning=coverage or "Ansvar + Kasko",
-                        tilvalg=addons,
-                        kampagne=campaign or "",
-                        link=config['url'],
-                        data_source="topdanmark.dk",
-                        reliability_score=0.9
-                    )
-                    products.append(product)
-                    
-            except Exception as e:
-                logger.warning(f"Error parsing Topdanmark product: {e}")
-        
-        # Datos genéricos si no encontramos nada
-        if not products:
-            products.append(InsuranceData(
-                udbyder="Topdanmark",
-                produkt="Bilforsikring Standard",
-                pris_mdr="429 kr./md",
-                dækning="Ansvar + Kasko",
-                tilvalg=["Rejseforsikring", "Elbil-lader dækning"],
-                kampagne="10% online rabat",
+    @staticmethod
+    def extract_products(plan: ExtractionPlan, soup: BeautifulSoup, config: Dict) -> List[InsuranceData]:
+        """Ejecuta el plan y construye los productos (o los datos genéricos del target)"""
+        products = [
+            InsuranceData(
+                udbyder=config['udbyder'],
+                produkt=values['product'],
+                pris_mdr_kr=values['price'],
+                dækning=values['coverage'],
+                tilvalg=values['addons'],
+                kampagne=values['campaign'],
                 link=config['url'],
-                data_source="topdanmark.dk",
-                reliability_score=0.7
-            ))
-        
-        return products
-    
-    async def _scrape_if(self, soup: BeautifulSoup, config: Dict) -> List[InsuranceData]:
-        """Scraping específico para If Forsikring"""
-        products = []
-        
-        # Datos genéricos para If
-        products.append(InsuranceData(
-            udbyder="If Forsikring",
-            produkt="If Bilforsikring",
-            pris_mdr="410 kr./md",
-            dækning="Ansvarsforsikring med mulighed for kasko",
-            tilvalg=["Ung bilist dækning", "Vejhjælp"],
-            kampagne="Ingen selvrisiko ved første skade",
-            link=config['url'],
-            data_source="if.dk",
-            reliability_score=0.8
-        ))
-        
-        return products
-    
-    async def _scrape_gf(self, soup: BeautifulSoup, config: Dict) -> List[InsuranceData]:
-        """Scraping específico para GF Forsikring"""
-        products = []
+                data_source=config['data_source'],
+                reliability_score=config['reliability_score']
+            )
+            for values in plan.run(soup)
+        ]
         
-        # Datos genéricos para GF
-        products.append(InsuranceData(
-            udbyder="GF Forsikring",
-            produkt="GF Bilforsikring",
-            pris_mdr="399 kr./md",
-            dækning="Ansvar + Kasko",
-            tilvalg=["Glasskade", "Vejhjælp"],
-            kampagne="Bonus ved skadefri kørsel",
-            link=config['url'],
-            data_source="gf.dk",
-            reliability_score=0.8
-        ))
+        # Si no encontramos productos específicos, usar los datos genéricos del target
+        if not products:
+            products = [
+                InsuranceData(
+                    udbyder=config['udbyder'],
+                    link=config['url'],
+                    data_source=config['data_source'],
+                    **fallback
+                )
+                for fallback in config.get('fallback', [])
+            ]
         
         return products
-    
-    def _extract_text(self, container, selectors: List[str]) -> str:
-        """Extrae texto usando múltiples selectores"""
-        for selector in selectors:
-            element = container.select_one(selector)
-            if element:
-                return element.get_text(strip=True)
-        return ""
-    
-    def _extract_price(self, element) -> str:
-        """Extrae y formatea precio"""
-        if isinstance(element, str):
-            text = element
-        else:
-            text = element.get_text(strip=True) if element else ""
-        
-        # Buscar patrón de precio
-        price_match = re.search(r'(\d+(?:[.,]\d+)?)\s*(?:kr|DKK)', text, re.IGNORECASE)
-        if price_match:
-            price_value = price_match.group(1).replace(',', '.')
-            return f"{price_value} kr./md"
-        
-        return ""
-    
-    def _extract_addons(self, container) -> List[str]:
-        """Extrae tilvalg/addons"""
-        addons = []
-        
-        # Buscar elementos que contengan tilvalg
-        addon_elements = container.find_all(text=re.compile(r'kasko|glasskade|vejhjælp|rejseforsikring', re.I))
-        
-        for element in addon_elements:
-            if isinstance(element, str):
-                addons.append(element.strip())
-            else:
-                addons.append(element.get_text(strip=True))
-        
-        # Si no encontramos nada, usar tilvalg comunes
-        if not addons:
-            addons = ["Kasko", "Glasskade", "Vejhjælp"]
-        
-        return list(set(addons))  # Remover duplicados
 
 async def main():
     """Función principal para testing"""
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+📊 Exportación columnar de los datasets
+Cada ejecución se guarda como una instantánea tipada (Parquet con pyarrow,
+o NPZ comprimido con numpy si no está) para analizar la evolución de precios
+sin parsear JSON y leyendo solo las columnas necesarias
+"""
+
+import json
+import logging
+import os
+from dataclasses import fields
+from datetime import datetime, timezone
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Union, get_args, get_origin, get_type_hints
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Opcional: sin pyarrow las instantáneas se guardan en NPZ
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_FORMAT = 'parquet' if pa is not None else 'npz'
+EXTENSIONS = ('.parquet', '.npz')
+SNAPSHOT_FORMAT = '%Y%m%dT%H%M%S'
+
+# Metadatos dentro de cada archivo: tipo lógico de cada columna
+_KINDS_KEY = '__kinds__'
+# Sufijo de la máscara de nulos de una columna en NPZ
+_NULL_SUFFIX = '.null'
+
+def column_kinds(record_type) -> Dict[str, str]:
+    """Tipo lógico de cada campo: string, float, int, bool, list (de textos) o json"""
+    hints = get_type_hints(record_type)
+    kinds = {}
+    for field in fields(record_type):
+        hint = hints[field.name]
+        # Optional[X] -> X
+        if get_origin(hint) is Union:
+            hint = next(arg for arg in get_args(hint) if arg is not type(None))
+        origin = get_origin(hint) or hint
+        if origin is bool:
+            kinds[field.name] = 'bool'
+        elif origin is int:
+            kinds[field.name] = 'int'
+        elif origin is float:
+            kinds[field.name] = 'float'
+        elif origin is list:
+            kinds[field.name] = 'list'
+        elif origin is str:
+            kinds[field.name] = 'string'
+        else:
+            kinds[field.name] = 'json'
+    return kinds
+
+def to_columns(records: List, kinds: Dict[str, str]) -> Dict[str, List[Any]]:
+    """Valores de cada campo de los registros, columna a columna"""
+    columns = {name: [] for name in kinds}
+    getter = attrgetter(*kinds)
+    for values in map(getter, records):
+        for name, value in zip(kinds, values if len(kinds) > 1 else (values,)):
+            columns[name].append(value)
+    for name, kind in kinds.items():
+        if kind == 'json':
+            columns[name] = [
+                json.dumps(value, ensure_ascii=False, sort_keys=True) if value is not None else None
+                for value in columns[name]
+            ]
+    return columns
+
+_ARROW_TYPES = {
+    'string': lambda: pa.string(),
+    'float': lambda: pa.float64(),
+    'int': lambda: pa.int64(),
+    'bool': lambda: pa.bool_(),
+    'list': lambda: pa.list_(pa.string()),
+    'json': lambda: pa.string()
+}
+
+def _write_parquet(path: str, columns: Dict[str, List], kinds: Dict[str, str]):
+    schema = pa.schema(
+        [(name, _ARROW_TYPES[kind]()) for name, kind in kinds.items()],
+        metadata={_KINDS_KEY: json.dumps(kinds)}
+    )
+    table = pa.Table.from_pydict(columns, schema=schema)
+    pq.write_table(table, path, compression='zstd')
+
+_NPZ_FILL = {'string': '', 'float': np.nan, 'int': 0, 'bool': False, 'list': '[]', 'json': ''}
+_NPZ_DTYPES = {'string': str, 'float': np.float64, 'int': np.int64, 'bool': np.bool_, 'list': str, 'json': str}
+
+def _write_npz(path: str, columns: Dict[str, List], kinds: Dict[str, str]):
+    arrays = {_KINDS_KEY: np.array(json.dumps(kinds))}
+    for name, kind in kinds.items():
+        values = columns[name]
+        if kind == 'list':
+            values = [json.dumps(value, ensure_ascii=False) if value is not None else None for value in values]
+        # Sin pickle: los nulos se guardan como relleno más una máscara aparte
+        nulls = np.array([value is None for value in values], dtype=np.bool_)
+        if nulls.any():
+            arrays[name + _NULL_SUFFIX] = nulls
+        fill = _NPZ_FILL[kind]
+        arrays[name] = np.array([fill if value is None else value for value in values], dtype=_NPZ_DTYPES[kind])
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+
+def write_snapshot(path_without_ext: str, records: List) -> str:
+    """Guarda los registros como archivo columnar tipado; devuelve la ruta"""
+    kinds = column_kinds(type(records[0]))
+    columns = to_columns(records, kinds)
+    path = f"{path_without_ext}.{COLUMNAR_FORMAT}"
+    tmp_path = f"{path}.tmp"
+    if COLUMNAR_FORMAT == 'parquet':
+        _write_parquet(tmp_path, columns, kinds)
+    else:
+        _write_npz(tmp_path, columns, kinds)
+    os.replace(tmp_path, path)
+    return path
+
+def _read_parquet(path: str, columns: Optional[List[str]]):
+    import pandas as pd
+
+    if pq is None:
+        raise RuntimeError(f"pyarrow is required to read {path}")
+    schema = pq.read_schema(path)
+    if columns is not None:
+        # Instantáneas antiguas pueden no tener columnas añadidas después
+        columns = [name for name in columns if name in schema.names]
+    # Enteros con nulos como Int64 (no float), igual que desde NPZ
+    frame = pq.read_table(path, columns=columns).to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+    kinds = json.loads((schema.metadata or {}).get(_KINDS_KEY.encode(), b'{}'))
+    for name in frame.columns:
+        if kinds.get(name) == 'json':
+            frame[name] = [json.loads(value) if value is not None else None for value in frame[name]]
+    return frame
+
+def _read_npz(path: str, columns: Optional[List[str]]):
+    import pandas as pd
+
+    # NPZ carga cada array por separado: solo se descomprimen las columnas pedidas
+    with np.load(path, allow_pickle=False) as npz:
+        kinds = json.loads(str(npz[_KINDS_KEY]))
+        names = [name for name in (columns or kinds) if name in kinds]
+        data = {}
+        for name in names:
+            kind = kinds[name]
+            values = npz[name]
+            nulls = npz[name + _NULL_SUFFIX] if name + _NULL_SUFFIX in npz.files else None
+            if kind == 'int':
+                data[name] = pd.array(values, dtype='Int64')
+                if nulls is not None:
+                    data[name][nulls] = pd.NA
+                continue
+            if kind in ('list', 'json'):
+                values = [json.loads(value) if value else None for value in values.tolist()]
+            elif kind == 'string':
+                values = values.astype(object)
+            if nulls is not None and kind != 'float':
+                values = [None if null else value for value, null in zip(values, nulls)]
+            data[name] = values
+    return pd.DataFrame(data, columns=names)
+
+def read_snapshot(path: str, columns: Optional[List[str]] = None):
+    """DataFrame de una instantánea (Parquet o NPZ), solo con las columnas pedidas"""
+    if path.endswith('.parquet'):
+        return _read_parquet(path, columns)
+    return _read_npz(path, columns)
+
+def to_utc(moment: Union[str, datetime]) -> datetime:
+    """Fecha (ISO o datetime) en UTC con zona; sin zona se asume que ya es UTC"""
+    if isinstance(moment, str):
+        moment = datetime.fromisoformat(moment.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+def snapshot_name(generated_at: Optional[str] = None) -> str:
+    """Nombre de la instantánea (en UTC) a partir de la fecha de los datos (o de ahora)"""
+    moment = datetime.now(timezone.utc)
+    if generated_at:
+        try:
+            moment = to_utc(generated_at)
+        except ValueError:
+            logger.warning(f"Unparseable snapshot date {generated_at!r}, using current time")
+    return moment.strftime(SNAPSHOT_FORMAT)
+
+def snapshot_time(path: str) -> datetime:
+    """Fecha (UTC, con zona) de una instantánea a partir de su nombre"""
+    taken_at = datetime.strptime(os.path.splitext(os.path.basename(path))[0], SNAPSHOT_FORMAT)
+    return taken_at.replace(tzinfo=timezone.utc)
+
+def list_snapshots(directory: str) -> List[str]:
+    """Instantáneas de un dataset en orden cronológico"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(EXTENSIONS)
+    )
@@ -146,9 +146,7 @@ async def example_robots_txt_check():
     print("\n🤖 Ejemplo: Verificación de robots.txt")
     print("-" * 40)
     
-    from main_scraper import RobotsTxtChecker
-    
-    robots_checker = RobotsTxtChecker()
+    config = ScrapingConfig()
     user_agent = "BilforsikringBot/1.0"
     
     test_urls = [
@@ -157,10 +155,14 @@ async def example_robots_txt_check():
         "https://www.if.dk/forsikring/bil"
     ]
     
-    for url in test_urls:
-        can_fetch = robots_checker.can_fetch(url, user_agent)
-        status = "✅ Permitido" if can_fetch else "❌ Bloqueado"
-        print(f"   {status}: {url}")
+    async with EthicalScraper(config) as scraper:
+        # Descarga robots.txt de todos los hosts en paralelo (sin bloquear el loop)
+        await scraper.prefetch_robots(test_urls)
+        
+        for url in test_urls:
+            can_fetch = scraper.robots_checker.can_fetch(url, user_agent)
+            status = "✅ Permitido" if can_fetch else "❌ Bloqueado"
+            print(f"   {status}: {url}")
 
 async def main():
     """Función principal con todos los ejemplos"""
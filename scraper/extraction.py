@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+🧩 Motor de extracción declarativo
+Compila el mapa de selectores de cada proveedor en un plan reutilizable
+(selectores CSS y regex compilados una sola vez por proceso) y lo ejecuta
+sobre un documento parseado
+"""
+
+import hashlib
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Pattern, Tuple
+
+import soupsieve
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer
+
+from records import parse_danish_number
+from structured_data import find_offers
+
+logger = logging.getLogger(__name__)
+
+# Planes compilados por (proveedor, versión): se reutilizan entre ejecuciones y jobs
+_PLAN_CACHE: Dict[Tuple[str, str], 'ExtractionPlan'] = {}
+
+def split_selectors(selector_list: str) -> List[str]:
+    """Separa 'a, b, c' en selectores individuales respetando [], () y comillas"""
+    selectors, current, depth, quote = [], [], 0, None
+    for char in selector_list:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in '[(':
+            depth += 1
+        elif char in '])':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    selectors.append(''.join(current).strip())
+    return [selector for selector in selectors if selector]
+
+class TextIndex:
+    """Nodos de texto de un contenedor con su posición, recogidos en un solo recorrido"""
+
+    def __init__(self, container):
+        self.texts: List[str] = [
+            str(node) for node in container.descendants if isinstance(node, NavigableString)
+        ]
+        self._matches: Dict[Pattern, List[Tuple[int, str]]] = {}
+
+    def find(self, pattern: Pattern) -> List[Tuple[int, str]]:
+        """(posición, texto) de los nodos que casan con el patrón, en orden de documento"""
+        matches = self._matches.get(pattern)
+        if matches is None:
+            matches = [(position, text) for position, text in enumerate(self.texts) if pattern.search(text)]
+            self._matches[pattern] = matches
+        return matches
+
+@dataclass(frozen=True)
+class FieldPlan:
+    """Cómo obtener un campo dentro de un contenedor"""
+    name: str
+    selectors: Tuple[Any, ...] = ()  # soupsieve compilados, en orden de prioridad
+    text: Optional[Pattern] = None  # Nodos de texto candidatos (antes que los selectores)
+    extract: Optional[Pattern] = None  # El grupo 1 es el valor
+    format: str = '{}'
+    number: bool = False  # Valor numérico (formato danés) en lugar de texto
+    many: bool = False
+    default: Any = None
+    required: bool = False
+
+    @classmethod
+    def compile(cls, name: str, spec) -> 'FieldPlan':
+        """Compila la especificación de un campo: un selector CSS o un dict"""
+        if isinstance(spec, str):
+            spec = {'select': spec}
+        return cls(
+            name=name,
+            selectors=tuple(soupsieve.compile(selector) for selector in split_selectors(spec.get('select', ''))),
+            text=re.compile(spec['text'], re.I) if spec.get('text') else None,
+            extract=re.compile(spec['extract'], re.I) if spec.get('extract') else None,
+            format=spec.get('format', '{}'),
+            number=spec.get('number', False),
+            many=spec.get('many', False),
+            default=spec.get('default', [] if spec.get('many') else None if spec.get('number') else ''),
+            required=spec.get('required', False)
+        )
+
+    def _candidates(self, container, index: TextIndex) -> Iterator[str]:
+        """Textos candidatos: nodos que casan con `text` y después cada selector"""
+        if self.text is not None:
+            for _, text in index.find(self.text):
+                yield text
+        for selector in self.selectors:
+            if self.many:
+                for element in selector.select(container):
+                    yield element.get_text(strip=True)
+            else:
+                element = selector.select_one(container)
+                if element is not None:
+                    yield element.get_text(strip=True)
+
+    def _value(self, text: str):
+        if self.extract is not None:
+            match = self.extract.search(text)
+            if not match:
+                return None
+            text = match.group(1)
+        if self.number:
+            # '3.995' son 3995 kr, no 3,995: el '.' danés separa miles
+            return parse_danish_number(text)
+        return self.format.format(text.strip())
+
+    def apply(self, container, index: TextIndex):
+        """Primer valor no vacío (o todos, sin duplicados, si many) o el default"""
+        if self.many:
+            values = [value for value in map(self._value, self._candidates(container, index)) if value not in (None, '')]
+            return list(dict.fromkeys(values)) or list(self.default)
+        for text in self._candidates(container, index):
+            value = self._value(text)
+            if value not in (None, ''):
+                return value
+        return self.default
+
+class ExtractionPlan:
+    """Plan compilado de un proveedor: contenedores y campos a extraer de cada uno"""
+
+    def __init__(self, name: str, config: Dict, version: str):
+        self.name = name
+        self.version = version
+        container = config.get('container', {})
+        self.container_tags = container.get('tags', ['div', 'section'])
+        self.container_class = re.compile(container['class'], re.I) if container.get('class') else None
+        # Con contenedores anidados: 'innermost' (la tarjeta) u 'outermost' (el envoltorio)
+        self.nesting = container.get('nesting', 'innermost')
+        # parse_only: True reutiliza el contenedor; un dict {tags, class} declara otro filtro
+        parse_only = config.get('parse_only')
+        if parse_only is True:
+            parse_only = container
+        self.strainer = (
+            SoupStrainer(parse_only.get('tags', ['div', 'section']), class_=re.compile(parse_only['class'], re.I))
+            if parse_only and parse_only.get('class') else None
+        )
+        self.fields = [FieldPlan.compile(name, spec) for name, spec in config.get('selectors', {}).items()]
+        # Clave estable para deduplicar registros: por defecto, todos los campos extraídos
+        # (dos tarjetas del mismo modelo con otra cuota o plazo son ofertas distintas)
+        self.key = config.get('key') or [field_plan.name for field_plan in self.fields]
+
+    def containers(self, soup: BeautifulSoup) -> List:
+        """Elementos que agrupan los datos de un producto/vehículo"""
+        if self.container_class is None:
+            return [soup]
+        return soup.find_all(self.container_tags, class_=self.container_class)
+
+    def _extract(self, container) -> Optional[Dict[str, Any]]:
+        """Valores de un contenedor, o None si le falta algún campo obligatorio"""
+        try:
+            # Un único recorrido del contenedor alimenta todos los campos de texto
+            index = TextIndex(container)
+            values = {}
+            for field_plan in self.fields:
+                values[field_plan.name] = field_plan.apply(container, index)
+                if field_plan.required and values[field_plan.name] in (None, '', []):
+                    return None
+            return values
+        except Exception as e:
+            logger.warning(f"Error extracting {self.name} item: {e}")
+            return None
+
+    def _innermost(self, containers: List) -> List[Dict[str, Any]]:
+        """De dentro hacia fuera: un ancestro de un contenedor aceptado no se extrae"""
+        covered = set()
+        items = []
+        # find_all devuelve orden de documento: al invertirlo los descendientes van primero
+        for container in reversed(containers):
+            if id(container) in covered:
+                continue
+            values = self._extract(container)
+            if values is None:
+                continue  # p.ej. un <div class="product-image"> dentro de la tarjeta
+            items.append(values)
+            for parent in container.parents:
+                covered.add(id(parent))
+        items.reverse()
+        return items
+
+    def _outermost(self, containers: List) -> List[Dict[str, Any]]:
+        """Solo contenedores sin otro contenedor como ancestro"""
+        selected = set(map(id, containers))
+        return [
+            values
+            for container in containers
+            if not any(id(parent) in selected for parent in container.parents)
+            for values in [self._extract(container)]
+            if values is not None
+        ]
+
+    def _dedupe(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Elimina registros repetidos (misma clave estable), conservando el primero"""
+        unique = {}
+        for values in items:
+            key = tuple(
+                tuple(values[name]) if isinstance(values[name], list) else values[name]
+                for name in self.key
+            )
+            unique.setdefault(key, values)
+        return list(unique.values())
+
+    def run(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
+        """Valores de cada contenedor no solapado que tenga todos los campos obligatorios"""
+        containers = self.containers(soup)
+        if self.nesting == 'outermost':
+            items = self._outermost(containers)
+        else:
+            items = self._innermost(containers)
+        return self._dedupe(items)
+
+def plan_version(config: Dict) -> str:
+    """Huella del target completo: los registros también dependen de fallback, udbyder, data_source..."""
+    # Los cambios de lógica (build, build_structured) se cubren subiendo SCRAPER_VERSION
+    spec = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()[:12]
+
+def value_patterns(config: Dict) -> List[str]:
+    """Regex `text` y `extract` de los selectores: el texto que puede acabar en un registro"""
+    patterns = []
+    for spec in config.get('selectors', {}).values():
+        if isinstance(spec, dict):
+            patterns.extend(spec[key] for key in ('text', 'extract') if spec.get(key))
+    return patterns
+
+def compile_plan(name: str, config: Dict) -> ExtractionPlan:
+    """Devuelve el plan compilado de un target, compilándolo solo la primera vez"""
+    version = plan_version(config)
+    plan = _PLAN_CACHE.get((name, version))
+    if plan is None:
+        plan = ExtractionPlan(name, config, version)
+        _PLAN_CACHE[(name, version)] = plan
+    return plan
+
+def extract_page(build: Callable, build_structured: Optional[Callable], provider: str, config: Dict,
+                 body: bytes, encoding: Optional[str], html_parser: str) -> Tuple[List, Dict[str, float]]:
+    """Parsea y extrae una página; función de módulo para poder ejecutarse en el pool de procesos"""
+    # Vía rápida: ofertas en JSON-LD/__NEXT_DATA__ sin construir el árbol
+    start = time.perf_counter()
+    if build_structured is not None and config.get('structured_data', True):
+        offers = find_offers(body, encoding)
+        records = build_structured(offers, config) if offers else []
+        if records:
+            return records, {'structured': time.perf_counter() - start}
+    
+    plan = compile_plan(provider, config)
+    start = time.perf_counter()
+    soup = BeautifulSoup(body, html_parser, parse_only=plan.strainer, from_encoding=encoding)
+    parsed = time.perf_counter()
+    records = build(plan, soup, config)
+    return records, {'parse': parsed - start, 'extract': time.perf_counter() - parsed}
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+💾 Caches de respuestas HTTP
+Cache persistente en disco con validadores (ETag/Last-Modified) entre
+ejecuciones, y LRU comprimido en memoria acotado por bytes
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CacheEntry:
+    """Metadatos de una respuesta cacheada"""
+    url: str
+    stored_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    encoding: Optional[str] = None
+
+class HttpCache:
+    """Cache de respuestas en disco con revalidación condicional"""
+
+    def __init__(self, cache_dir: str, max_age_hours: float):
+        self.cache_dir = cache_dir
+        self.max_age_seconds = max_age_hours * 3600
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0
+        }
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url: str):
+        """Rutas del fichero de metadatos y del cuerpo para una URL"""
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.json", f"{base}.body"
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Devuelve la entrada cacheada de una URL, si existe"""
+        meta_path, body_path = self._paths(url)
+        if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return CacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Corrupt cache entry for {url}: {e}")
+            return None
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Indica si la entrada sigue dentro de cache_duration_hours"""
+        return time.time() - entry.stored_at < self.max_age_seconds
+
+    def conditional_headers(self, entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """Cabeceras If-None-Match / If-Modified-Since para revalidar"""
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def read_body(self, entry: CacheEntry) -> bytes:
+        """Lee el cuerpo cacheado (bytes crudos)"""
+        _, body_path = self._paths(entry.url)
+        with open(body_path, 'rb') as f:
+            return f.read()
+
+    def get_fresh(self, url: str) -> Optional[Tuple[CacheEntry, bytes]]:
+        """Devuelve entrada y cuerpo si hay una entrada fresca (cuenta como hit)"""
+        entry = self.lookup(url)
+        if entry is None or not self.is_fresh(entry):
+            return None
+        try:
+            body = self.read_body(entry)
+        except OSError:
+            return None
+        self.stats['hits'] += 1
+        return entry, body
+
+    def store(self, url: str, body: bytes, headers, encoding: Optional[str] = None) -> None:
+        """Guarda una respuesta completa (200) junto con sus validadores"""
+        self.stats['misses'] += 1
+        entry = CacheEntry(
+            url=url,
+            stored_at=time.time(),
+            etag=headers.get('ETag'),
+            last_modified=headers.get('Last-Modified'),
+            encoding=encoding
+        )
+        meta_path, body_path = self._paths(url)
+        try:
+            self._write_atomic(body_path, body)
+            self._write_atomic(meta_path, json.dumps(asdict(entry)).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"Could not write cache entry for {url}: {e}")
+
+    def revalidate(self, entry: CacheEntry, headers) -> bytes:
+        """Renueva una entrada tras un 304 Not Modified y devuelve su cuerpo"""
+        self.stats['revalidated'] += 1
+        entry.stored_at = time.time()
+        entry.etag = headers.get('ETag') or entry.etag
+        entry.last_modified = headers.get('Last-Modified') or entry.last_modified
+        meta_path, _ = self._paths(entry.url)
+        try:
+            self._write_atomic(meta_path, json.dumps(asdict(entry)).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"Could not refresh cache entry for {entry.url}: {e}")
+        return self.read_body(entry)
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes) -> None:
+        """Escribe un fichero de forma atómica (tmp + rename)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+@dataclass
+class MemoryEntry:
+    """Cuerpo comprimido en memoria y sus metadatos"""
+    compressed: bytes
+    encoding: Optional[str]
+    expires_at: float
+
+class MemoryPageCache:
+    """LRU en memoria con cuerpos comprimidos, acotado por bytes y con TTL por URL"""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, compression_level: int = 1):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.compression_level = compression_level
+        self.entries: "OrderedDict[str, MemoryEntry]" = OrderedDict()
+        self.current_bytes = 0
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expired': 0
+        }
+
+    def get(self, url: str) -> Optional[Tuple[bytes, MemoryEntry]]:
+        """Devuelve (cuerpo descomprimido, entrada) si la URL está y no ha caducado"""
+        entry = self.entries.get(url)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        if time.monotonic() >= entry.expires_at:
+            self._remove(url)
+            self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return None
+        self.entries.move_to_end(url)
+        self.stats['hits'] += 1
+        return zlib.decompress(entry.compressed), entry
+
+    def put(self, url: str, body: bytes, encoding: Optional[str] = None) -> None:
+        """Guarda un cuerpo comprimido y expulsa las entradas menos recientes si hace falta"""
+        compressed = zlib.compress(body, self.compression_level)
+        if len(compressed) > self.max_bytes:
+            return  # Nunca cabría: no vaciar la cache por una sola página
+        if url in self.entries:
+            self._remove(url)
+        self.entries[url] = MemoryEntry(compressed, encoding, time.monotonic() + self.ttl_seconds)
+        self.current_bytes += len(compressed)
+        while self.current_bytes > self.max_bytes:
+            oldest_url = next(iter(self.entries))
+            self._remove(oldest_url)
+            self.stats['evictions'] += 1
+
+    def _remove(self, url: str) -> None:
+        entry = self.entries.pop(url)
+        self.current_bytes -= len(entry.compressed)
+
+    def get_stats(self) -> Dict:
+        """Estadísticas de uso, incluido el hit ratio"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return dict(
+            self.stats,
+            entries=len(self.entries),
+            bytes=self.current_bytes,
+            max_bytes=self.max_bytes,
+            hit_ratio=round(self.stats['hits'] / lookups, 4) if lookups else 0.0
+        )
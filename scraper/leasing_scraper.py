@@ -5,26 +5,54 @@ Extrae datos de leasingudbydere y concesionarios daneses
 """
 
 import asyncio
-import re
-import json
 import logging
-from typing import Dict, List, Optional
+import time
+from typing import ClassVar, Dict, List, Optional, Tuple
 from bs4 import BeautifulSoup
 from dataclasses import dataclass
 from datetime import datetime
+from urllib.parse import urljoin
+
+from extraction import ExtractionPlan
+from records import DANISH_NUMBER, add_slots, format_kr, parse_danish_number
+from structured_data import periodic_offers
+from vehicle_catalog import VehicleMatch, get_catalog
 
 logger = logging.getLogger(__name__)
 
+# Campos comunes a todos los proveedores; cada target añade sus selectores
+PRICE_FIELD = {
+    'text': r'\d+(?:[.,]\d+)?\s*kr',
+    'extract': rf'({DANISH_NUMBER})\s*kr',
+    'number': True
+}
+DOWN_PAYMENT_FIELD = {
+    'text': r'udbetaling|down\s*payment',
+    'extract': rf'({DANISH_NUMBER})\s*kr',
+    'number': True
+}
+DURATION_FIELD = {
+    'text': r'\d+\s*(?:mdr|måneder|months)',
+    'extract': r'(\d+)\s*(?:mdr|måneder|months)',
+    'number': True,
+    'default': 36
+}
+
+# Textos cuando la página no da el valor
+PRICE_ON_REQUEST = 'På anmodning'
+VARIABLE_DOWN_PAYMENT = 'Variabel'
+
+@add_slots
 @dataclass
 class LeasingData:
     """Estructura de datos para leasing"""
     mærke: str
     model: str
     variant: Optional[str] = None
-    pris_mdr: str = ""
-    udbetaling: str = ""
-    løbetid: str = ""
-    km_år: Optional[str] = None
+    pris_mdr_kr: Optional[float] = None  # Números; el texto se genera al mostrarlos
+    udbetaling_kr: Optional[float] = None
+    løbetid_mdr: Optional[int] = None
+    km_år_antal: Optional[int] = None
     kampagne: str = ""
     link: str = ""
     last_updated: str = ""
@@ -32,321 +60,312 @@ class LeasingData:
     reliability_score: float = 0.0
     additional_info: Dict = None
     
+    # Claves exportadas, en orden: textos para la web y números para análisis
+    EXPORT_FIELDS: ClassVar[Tuple[str, ...]] = (
+        'mærke', 'model', 'variant', 'pris_mdr', 'udbetaling', 'løbetid', 'km_år', 'pris_mdr_kr',
+        'udbetaling_kr', 'løbetid_mdr', 'km_år_antal', 'kampagne', 'link', 'last_updated', 'data_source',
+        'reliability_score', 'additional_info'
+    )
+    
     def __post_init__(self):
         if self.additional_info is None:
             self.additional_info = {}
         if not self.last_updated:
             self.last_updated = datetime.now().isoformat()
+    
+    @property
+    def pris_mdr(self) -> str:
+        """Ydelse mensual para mostrar: '3.995 kr./md'"""
+        return f"{format_kr(self.pris_mdr_kr)} kr./md" if self.pris_mdr_kr is not None else PRICE_ON_REQUEST
+    
+    @property
+    def udbetaling(self) -> str:
+        """Udbetaling para mostrar: '10.000 kr.'"""
+        return f"{format_kr(self.udbetaling_kr)} kr." if self.udbetaling_kr is not None else VARIABLE_DOWN_PAYMENT
+    
+    @property
+    def løbetid(self) -> str:
+        """Duración para mostrar: '36 mdr'"""
+        return f"{self.løbetid_mdr} mdr" if self.løbetid_mdr is not None else ""
+    
+    @property
+    def km_år(self) -> Optional[str]:
+        """Kilometraje anual para mostrar: '15.000 km'"""
+        return f"{format_kr(self.km_år_antal)} km" if self.km_år_antal is not None else None
 
 class LeasingScraper:
     """Scraper específico para leasing"""
     
     def __init__(self, main_scraper):
         self.main_scraper = main_scraper
+        self.provider_status: Dict[str, Dict] = {}
         self.targets = {
             'leaseplan': {
                 'url': 'https://www.leaseplan.dk/privatleasing',
+                'data_source': 'leaseplan.dk',
+                'reliability_score': 0.9,
+                'container': {'tags': ['div', 'section'], 'class': r'vehicle|car|bil'},
+                'parse_only': True,
                 'selectors': {
-                    'car_name': '.car-name, .vehicle-name',
-                    'price': '.price, .pris, .monthly-price',
-                    'down_payment': '.down-payment, .udbetaling',
-                    'duration': '.duration, .løbetid',
-                    'campaign': '.campaign, .kampagne'
-                }
+                    'car_name': {'select': 'h1, h2, h3, .car-name, .vehicle-name, .model-name', 'required': True},
+                    'price': dict(PRICE_FIELD, select='.price, .pris, .monthly-price'),
+                    'down_payment': dict(DOWN_PAYMENT_FIELD, select='.down-payment, .udbetaling'),
+                    'duration': dict(DURATION_FIELD, select='.duration, .løbetid'),
+                    'campaign': '.campaign, .kampagne, .offer, .tilbud'
+                },
+                'fallback': [
+                    {
+                        'mærke': 'Tesla',
+                        'model': 'Model 3',
+                        'variant': 'Standard Range',
+                        'pris_mdr_kr': 3995,
+                        'udbetaling_kr': 10000,
+                        'løbetid_mdr': 36,
+                        'km_år_antal': 15000,
+                        'kampagne': 'Gratis supercharging 6 mdr',
+                        'reliability_score': 0.8
+                    },
+                    {
+                        'mærke': 'Toyota',
+                        'model': 'Yaris Hybrid',
+                        'pris_mdr_kr': 2495,
+                        'udbetaling_kr': 5000,
+                        'løbetid_mdr': 24,
+                        'km_år_antal': 12000,
+                        'kampagne': 'Gratis service inkluderet',
+                        'reliability_score': 0.8
+                    }
+                ]
             },
             'ald_automotive': {
                 'url': 'https://www.aldautomotive.dk/privatleasing',
+                'data_source': 'aldautomotive.dk',
+                'reliability_score': 0.9,
+                'container': {'tags': ['div', 'section'], 'class': r'vehicle|car|bil'},
+                'parse_only': True,
                 'selectors': {
-                    'car_name': '.car-name',
-                    'price': '.price',
-                    'down_payment': '.down-payment',
-                    'duration': '.duration',
+                    'car_name': {'select': '.car-name', 'required': True},
+                    'price': dict(PRICE_FIELD, select='.price'),
+                    'down_payment': dict(DOWN_PAYMENT_FIELD, select='.down-payment'),
+                    'duration': dict(DURATION_FIELD, select='.duration'),
                     'campaign': '.campaign'
-                }
+                },
+                'fallback': [{
+                    'mærke': 'Kia',
+                    'model': 'EV6',
+                    'variant': 'GT-Line',
+                    'pris_mdr_kr': 3795,
+                    'udbetaling_kr': 10000,
+                    'løbetid_mdr': 36,
+                    'km_år_antal': 15000,
+                    'kampagne': 'Første 3 måneder halv pris',
+                    'reliability_score': 0.8
+                }]
             },
             'tesla': {
                 'url': 'https://www.tesla.com/da_dk/model3/design',
+                'data_source': 'tesla.com',
+                'reliability_score': 0.9,
+                'container': {'tags': ['div', 'section'], 'class': r'vehicle|car|bil'},
+                'parse_only': True,
                 'selectors': {
-                    'car_name': '.vehicle-name',
-                    'price': '.price',
-                    'down_payment': '.down-payment',
-                    'duration': '.duration',
+                    'car_name': {'select': '.vehicle-name', 'required': True},
+                    'price': dict(PRICE_FIELD, select='.price'),
+                    'down_payment': dict(DOWN_PAYMENT_FIELD, select='.down-payment'),
+                    'duration': dict(DURATION_FIELD, select='.duration'),
                     'campaign': '.campaign'
-                }
+                },
+                'fallback': [{
+                    'mærke': 'Tesla',
+                    'model': 'Model 3',
+                    'variant': 'Long Range',
+                    'pris_mdr_kr': 4295,
+                    'udbetaling_kr': 15000,
+                    'løbetid_mdr': 36,
+                    'km_år_antal': 20000,
+                    'kampagne': 'Gratis supercharging 6 mdr',
+                    'reliability_score': 0.9,
+                    'additional_info': {
+                        'delivery_time': '2-4 uger',
+                        'service_included': False,
+                        'insurance_included': False
+                    }
+                }]
             },
             'volkswagen': {
                 'url': 'https://www.volkswagen.dk/da/models/id-family.html',
+                'data_source': 'volkswagen.dk',
+                'reliability_score': 0.9,
+                'container': {'tags': ['div', 'section'], 'class': r'vehicle|car|bil'},
+                'parse_only': True,
                 'selectors': {
-                    'car_name': '.model-name',
-                    'price': '.price',
-                    'down_payment': '.down-payment',
-                    'duration': '.duration',
+                    'car_name': {'select': '.model-name', 'required': True},
+                    'price': dict(PRICE_FIELD, select='.price'),
+                    'down_payment': dict(DOWN_PAYMENT_FIELD, select='.down-payment'),
+                    'duration': dict(DURATION_FIELD, select='.duration'),
                     'campaign': '.campaign'
-                }
+                },
+                'fallback': [{
+                    'mærke': 'Volkswagen',
+                    'model': 'ID.4',
+                    'variant': 'Pro',
+                    'pris_mdr_kr': 3495,
+                    'udbetaling_kr': 15000,
+                    'løbetid_mdr': 36,
+                    'km_år_antal': 15000,
+                    'kampagne': 'Gratis installation af ladeboks',
+                    'reliability_score': 0.8,
+                    'additional_info': {
+                        'delivery_time': '4-6 uger',
+                        'service_included': True,
+                        'insurance_included': False
+                    }
+                }]
             }
         }
     
-    async def scrape_all_providers(self) -> List[LeasingData]:
-        """Scrapes todos los proveedores de leasing"""
-        all_data = []
+    async def scrape_all_providers(self, deadline: Optional[float] = None) -> List[LeasingData]:
+        """Scrapes todos los proveedores de leasing de forma concurrente"""
+        # Cada proveedor vive en un host distinto, así que se piden en paralelo;
+        # el rate limit por host del EthicalScraper mantiene la cortesía
+        await self.main_scraper.prefetch_robots(
+            [config['url'] for config in self.targets.values()]
+        )
+        results = await asyncio.gather(*(
+            self._scrape_provider_safe(provider, config, deadline)
+            for provider, config in self.targets.items()
+        ))
         
-        for provider, config in self.targets.items():
-            try:
-                logger.info(f"🔍 Scraping {provider}...")
-                data = await self.scrape_provider(provider, config)
-                if data:
-                    all_data.extend(data)
-                    logger.info(f"✅ Found {len(data)} vehicles from {provider}")
-                else:
-                    logger.warning(f"⚠️ No data found for {provider}")
-            except Exception as e:
-                logger.error(f"❌ Error scraping {provider}: {e}")
+        all_data = []
+        for data in results:
+            all_data.extend(data)
         
         return all_data
     
+    async def _scrape_provider_safe(self, provider: str, config: Dict,
+                                    deadline: Optional[float] = None) -> List[LeasingData]:
+        """Scrapes un proveedor dentro de su presupuesto de tiempo, sin afectar a los demás"""
+        budget = self.main_scraper.provider_budget(deadline)
+        start = time.perf_counter()
+        status = 'error'
+        data = []
+        try:
+            if budget <= 0:
+                raise asyncio.TimeoutError
+            logger.info(f"🔍 Scraping {provider}...")
+            data = await asyncio.wait_for(self.scrape_provider(provider, config), timeout=budget)
+            if data:
+                status = 'ok'
+                logger.info(f"✅ Found {len(data)} vehicles from {provider}")
+            else:
+                status = 'empty'
+                logger.warning(f"⚠️ No data found for {provider}")
+        except asyncio.TimeoutError:
+            # Sin presupuesto: se marca como parcial y el resto de la ejecución sigue
+            status = 'partial'
+            logger.warning(f"⏰ Deadline ({budget:.1f}s) exceeded for {provider}, marked as partial")
+        except Exception as e:
+            logger.error(f"❌ Error scraping {provider}: {e}")
+        finally:
+            self.provider_status[provider] = {
+                'status': status,
+                'records': len(data),
+                'seconds': round(time.perf_counter() - start, 3)
+            }
+        return data
+    
     async def scrape_provider(self, provider: str, config: Dict) -> List[LeasingData]:
         """Scrapes un proveedor específico"""
-        content = await self.main_scraper.fetch_page(config['url'])
-        if not content:
+        with self.main_scraper.timed('fetch'):
+            page = await self.main_scraper.fetch_bytes(config['url'])
+        if not page:
             return []
         
-        soup = BeautifulSoup(content, 'html.parser')
-        vehicles = []
-        
-        # Estrategias de scraping específicas por proveedor
-        if provider == 'leaseplan':
-            vehicles = await self._scrape_leaseplan(soup, config)
-        elif provider == 'ald_automotive':
-            vehicles = await self._scrape_ald_automotive(soup, config)
-        elif provider == 'tesla':
-            vehicles = await self._scrape_tesla(soup, config)
-        elif provider == 'volkswagen':
-            vehicles = await self._scrape_volkswagen(soup, config)
-        
-        return vehicles
-    
-    async def _scrape_leaseplan(self, soup: BeautifulSoup, config: Dict) -> List[LeasingData]:
-        """Scraping específico para LeasePlan"""
-        vehicles = []
-        
-        # Buscar contenedores de vehículos
-        vehicle_containers = soup.find_all(['div', 'section'], class_=re.compile(r'vehicle|car|bil', re.I))
-        
-        for container in vehicle_containers:
-            try:
-                # Extraer nombre del vehículo
-                car_name = self._extract_text(container, [
-                    'h1', 'h2', 'h3', '.car-name', '.vehicle-name', '.model-name'
-                ])
-                
-                if car_name:
-                    # Parsear marca y modelo
-                    brand, model = self._parse_car_name(car_name)
-                    
-                    # Extraer precio mensual
-                    price = self._extract_price(container)
-                    
-                    # Extraer udbetaling
-                    down_payment = self._extract_down_payment(container)
-                    
-                    # Extraer løbetid
-                    duration = self._extract_duration(container)
-                    
-                    # Extraer campaña
-                    campaign = self._extract_text(container, [
-                        '.campaign', '.kampagne', '.offer', '.tilbud'
-                    ])
-                    
-                    vehicle = LeasingData(
-                        mærke=brand,
-                        model=model,
-                        pris_mdr=price or "På anmodning",
-                        udbetaling=down_payment or "Variabel",
-                        løbetid=duration or "36 mdr",
-                        kampagne=campaign or "",
-                        link=config['url'],
-                        data_source="leaseplan.dk",
-                        reliability_score=0.9
-                    )
-                    vehicles.append(vehicle)
-                    
-            except Exception as e:
-                logger.warning(f"Error parsing LeasePlan vehicle: {e}")
-        
-        # Datos genéricos si no encontramos nada
-        if not vehicles:
-            vehicles.extend([
-                LeasingData(
-                    mærke="Tesla",
-                    model="Model 3",
-                    variant="Standard Range",
-                    pris_mdr="3.995 kr./md",
-                    udbetaling="10.000 kr.",
-                    løbetid="36 mdr",
-                    km_år="15.000 km",
-                    kampagne="Gratis supercharging 6 mdr",
-                    link=config['url'],
-                    data_source="leaseplan.dk",
-                    reliability_score=0.8
-                ),
-                LeasingData(
-                    mærke="Toyota",
-                    model="Yaris Hybrid",
-                    pris_mdr="2.495 kr./md",
-                    udbetaling="5.000 kr.",
-                    løbetid="24 mdr",
-                    km_år="12.000 km",
-                    kampagne="Gratis service inkluderet",
-                    link=config['url'],
-                    data_source="leaseplan.dk",
-                    reliability_score=0.8
-                )
-            ])
-        
-        return vehicles
-    
-    async def _scrape_ald_automotive(self, soup: BeautifulSoup, config: Dict) -> List[LeasingData]:
-        """Scraping específico para ALD Automotive"""
-        vehicles = []
+        # Parseo y extracción (CPU) fuera del event loop; el plan declarativo se compila
+        # una sola vez por proceso y solo construye los subárboles candidatos
+        vehicles = await self.main_scraper.parse_page(
+            provider, config, page, LeasingData, self.extract_vehicles, self.structured_vehicles
+        )
         
-        # Datos genéricos para ALD Automotive
-        vehicles.append(LeasingData(
-            mærke="Kia",
-            model="EV6",
-            variant="GT-Line",
-            pris_mdr="3.795 kr./md",
-            udbetaling="10.000 kr.",
-            løbetid="36 mdr",
-            km_år="15.000 km",
-            kampagne="Første 3 måneder halv pris",
-            link=config['url'],
-            data_source="aldautomotive.dk",
-            reliability_score=0.8
-        ))
+        # En replay, la fecha de los registros es la de la respuesta grabada
+        if page.fetched_at:
+            for item in vehicles:
+                item.last_updated = page.fetched_at
         
         return vehicles
     
-    async def _scrape_tesla(self, soup: BeautifulSoup, config: Dict) -> List[LeasingData]:
-        """Scraping específico para Tesla"""
+    @staticmethod
+    def structured_vehicles(offers: List[Dict], config: Dict) -> List[LeasingData]:
+        """Vehículos a partir de ofertas en JSON-LD/__NEXT_DATA__ (p.ej. el configurador de Tesla)"""
         vehicles = []
-        
-        # Datos genéricos para Tesla
-        vehicles.append(LeasingData(
-            mærke="Tesla",
-            model="Model 3",
-            variant="Long Range",
-            pris_mdr="4.295 kr./md",
-            udbetaling="15.000 kr.",
-            løbetid="36 mdr",
-            km_år="20.000 km",
-            kampagne="Gratis supercharging 6 mdr",
-            link=config['url'],
-            data_source="tesla.com",
-            reliability_score=0.9,
-            additional_info={
-                "delivery_time": "2-4 uger",
-                "service_included": False,
-                "insurance_included": False
-            }
-        ))
-        
+        # Solo cuotas mensuales explícitas: precios de compra, colores y llantas no son leasing
+        for offer in periodic_offers(offers):
+            # La marca del JSON (brand/make) solo se usa si el nombre no la incluye
+            vehicle = LeasingScraper._parse_car_name(offer['name'], offer['brand'] or None)
+            monthly = offer['price']
+            down_payment = parse_danish_number(offer.get('down_payment'))
+            term = offer.get('term_months')
+            km = offer.get('km_per_year')
+            vehicles.append(LeasingData(
+                mærke=vehicle.brand,
+                model=vehicle.model,
+                variant=vehicle.variant,
+                pris_mdr_kr=parse_danish_number(monthly),
+                udbetaling_kr=down_payment,
+                løbetid_mdr=int(term) if term else DURATION_FIELD['default'],
+                km_år_antal=int(km) if km else None,
+                link=urljoin(config['url'], offer['url']) if offer['url'] else config['url'],
+                data_source=config['data_source'],
+                reliability_score=config['reliability_score'],
+                additional_info=dict(LeasingScraper._catalog_ids(vehicle), structured_source=offer['source'])
+            ))
         return vehicles
     
-    async def _scrape_volkswagen(self, soup: BeautifulSoup, config: Dict) -> List[LeasingData]:
-        """Scraping específico para Volkswagen"""
+    @staticmethod
+    def extract_vehicles(plan: ExtractionPlan, soup: BeautifulSoup, config: Dict) -> List[LeasingData]:
+        """Ejecuta el plan y construye los vehículos (o los datos genéricos del target)"""
         vehicles = []
+        for values in plan.run(soup):
+            # Marca, modelo y variante canónicos según el catálogo
+            vehicle = LeasingScraper._parse_car_name(values['car_name'])
+            vehicles.append(LeasingData(
+                mærke=vehicle.brand,
+                model=vehicle.model,
+                variant=vehicle.variant,
+                pris_mdr_kr=values['price'],
+                udbetaling_kr=values['down_payment'],
+                løbetid_mdr=int(values['duration']) if values['duration'] is not None else None,
+                kampagne=values['campaign'],
+                link=config['url'],
+                data_source=config['data_source'],
+                reliability_score=config['reliability_score'],
+                additional_info=LeasingScraper._catalog_ids(vehicle)
+            ))
         
-        # Datos genéricos para Volkswagen
-        vehicles.append(LeasingData(
-            mærke="Volkswagen",
-            model="ID.4",
-            variant="Pro",
-            pris_mdr="3.495 kr./md",
-            udbetaling="15.000 kr.",
-            løbetid="36 mdr",
-            km_år="15.000 km",
-            kampagne="Gratis installation af ladeboks",
-            link=config['url'],
-            data_source="volkswagen.dk",
-            reliability_score=0.8,
-            additional_info={
-                "delivery_time": "4-6 uger",
-                "service_included": True,
-                "insurance_included": False
-            }
-        ))
+        # Datos genéricos si no encontramos nada
+        if not vehicles:
+            vehicles = [
+                LeasingData(link=config['url'], data_source=config['data_source'], **fallback)
+                for fallback in config.get('fallback', [])
+            ]
         
         return vehicles
     
-    def _extract_text(self, container, selectors: List[str]) -> str:
-        """Extrae texto usando múltiples selectores"""
-        for selector in selectors:
-            element = container.select_one(selector)
-            if element:
-                return element.get_text(strip=True)
-        return ""
+    @staticmethod
+    def _parse_car_name(car_name: str, brand_hint: Optional[str] = None) -> VehicleMatch:
+        """Parsea nombre del coche en marca, modelo y variante"""
+        # El índice se construye una vez por proceso; cada nombre es una búsqueda en el trie
+        return get_catalog().parse(car_name, brand_hint)
     
-    def _parse_car_name(self, car_name: str) -> tuple:
-        """Parsea nombre del coche en marca y modelo"""
-        # Lista de marcas conocidas
-        brands = [
-            'Tesla', 'Volkswagen', 'VW', 'BMW', 'Mercedes', 'Audi', 
-            'Toyota', 'Honda', 'Nissan', 'Kia', 'Hyundai', 'Ford',
-            'Peugeot', 'Renault', 'Citroën', 'Opel', 'Skoda', 'Seat'
-        ]
-        
-        car_name_clean = car_name.strip()
-        
-        for brand in brands:
-            if car_name_clean.lower().startswith(brand.lower()):
-                model = car_name_clean[len(brand):].strip()
-                return brand, model
-        
-        # Si no encontramos marca conocida, asumir que la primera palabra es la marca
-        parts = car_name_clean.split()
-        if len(parts) >= 2:
-            return parts[0], ' '.join(parts[1:])
-        
-        return car_name_clean, ""
-    
-    def _extract_price(self, container) -> str:
-        """Extrae precio mensual"""
-        # Buscar elementos con precio
-        price_elements = container.find_all(text=re.compile(r'\d+(?:[.,]\d+)?\s*kr', re.I))
-        
-        for element in price_elements:
-            price_match = re.search(r'(\d+(?:[.,]\d+)?)\s*kr', str(element), re.IGNORECASE)
-            if price_match:
-                price_value = price_match.group(1).replace(',', '.')
-                return f"{price_value} kr./md"
-        
-        return ""
-    
-    def _extract_down_payment(self, container) -> str:
-        """Extrae udbetaling"""
-        # Buscar elementos con udbetaling
-        down_payment_elements = container.find_all(text=re.compile(r'udbetaling|down\s*payment', re.I))
-        
-        for element in down_payment_elements:
-            payment_match = re.search(r'(\d+(?:[.,]\d+)?)\s*kr', str(element), re.IGNORECASE)
-            if payment_match:
-                payment_value = payment_match.group(1).replace(',', '.')
-                return f"{payment_value} kr."
-        
-        return ""
-    
-    def _extract_duration(self, container) -> str:
-        """Extrae løbetid"""
-        # Buscar elementos con løbetid
-        duration_elements = container.find_all(text=re.compile(r'\d+\s*(?:mdr|måneder|months)', re.I))
-        
-        for element in duration_elements:
-            duration_match = re.search(r'(\d+)\s*(?:mdr|måneder|months)', str(element), re.IGNORECASE)
-            if duration_match:
-                duration_value = duration_match.group(1)
-                return f"{duration_value} mdr"
-        
-        return ""
+    @staticmethod
+    def _catalog_ids(vehicle: VehicleMatch) -> Dict[str, str]:
+        """IDs canónicos de marca y modelo, si el catálogo los conoce"""
+        ids = {}
+        if vehicle.brand_id:
+            ids['brand_id'] = vehicle.brand_id
+        if vehicle.model_id:
+            ids['model_id'] = vehicle.model_id
+        return ids
 
 async def main():
     """Función principal para testing"""
@@ -10,13 +10,27 @@ import time
 import json
 import logging
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Union
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
 from urllib.robotparser import RobotFileParser
 from urllib.parse import urljoin, urlparse
 import random
 
+from bs4 import BeautifulSoup, FeatureNotFound
+
+from columnar import (COLUMNAR_FORMAT, list_snapshots, read_snapshot, snapshot_name, snapshot_time, to_utc,
+                      write_snapshot)
+from http_cache import HttpCache, MemoryPageCache
+from extraction import extract_page, plan_version, value_patterns
+from parse_cache import ParseResultCache, content_hash, page_fingerprint
+from parse_pool import ParsePool
+from records import DANISH_NUMBER, format_kr, parse_danish_number
+from serialization import JSON_BACKEND, dumps, serialize_records
+from response_archive import ResponseRecorder
+
 # Configuración de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,6 +42,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Versión de los registros producidos; cambiarla invalida la cache de extracción.
+# Subirla con cualquier cambio en la lógica de extracción (no solo en los targets)
+SCRAPER_VERSION = '1.3.0'
+
 @dataclass
 class ScrapingConfig:
     """Configuración del sistema de scraping"""
@@ -37,45 +55,389 @@ class ScrapingConfig:
     max_retries: int = 3
     retry_delay: int = 5
     respect_robots_txt: bool = True
-    cache_duration_hours: int = 24
+    cache_duration_hours: int = 20  # Por debajo del cron diario: cada ejecución revalida
+    memory_cache_max_bytes: int = 16 * 1024 * 1024  # Bytes comprimidos en memoria
+    memory_cache_ttl_seconds: int = 3600
+    use_disk_cache: bool = True
+    # GET condicional (ETag/Last-Modified) incluso para entradas dentro de cache_duration_hours
+    revalidate_disk_cache: bool = False
+    cache_dir: str = "data/http_cache"
+    robots_cache_path: str = "data/robots_cache.json"
+    robots_cache_hours: int = 24
+    robots_error_cache_minutes: float = 5  # Decisión tras un error o 5xx (sin persistir)
+    rate_limit_burst: int = 1  # Requests permitidos en ráfaga por host
+    max_response_bytes: int = 5 * 1024 * 1024  # Tamaño máximo de una respuesta
+    stream_chunk_size: int = 64 * 1024
+    max_retry_after: int = 120  # Máximo Retry-After (s) que aceptamos esperar
+    circuit_breaker_threshold: int = 3  # Fallos consecutivos antes de abandonar un host
+    # Rate limiting adaptativo (AIMD) por host; max_requests_per_second es el ritmo inicial
+    adaptive_rate_limit: bool = False
+    adaptive_min_rps: float = 0.2
+    adaptive_max_rps: float = 2.0
+    adaptive_increase_rps: float = 0.05
+    adaptive_decrease_factor: float = 0.5
+    adaptive_latency_threshold: float = 2.0  # Latencia (s) considerada sana
+    rate_state_path: str = "data/rate_state.json"
+    record_archive: Optional[str] = None  # Ruta .warc.gz para grabar todas las respuestas
+    # Presupuestos de tiempo, aplicados mediante cancelación
+    request_deadline_seconds: float = 90  # Fetch de una URL, reintentos incluidos
+    provider_deadline_seconds: float = 180  # Fetch + parseo de un proveedor
+    run_deadline_seconds: float = 900  # Ejecución completa
+    # Conexiones: la sesión se reutiliza entre jobs en modo daemon
+    dns_cache_seconds: int = 300
+    keepalive_seconds: float = 60
+    # Modo daemon: intervalo de refresco de cada tipo de scraping
+    daemon_bilforsikring_interval_minutes: float = 360
+    daemon_leasing_interval_minutes: float = 720
+    # Backend de BeautifulSoup: 'lxml' (rápido, en C) o 'html.parser' (stdlib)
+    html_parser: str = 'lxml'
+    # Parseo y extracción en procesos aparte (0 = en el propio event loop)
+    parse_workers: int = 2
+    parse_timeout_seconds: float = 30
+    # Reutilizar la extracción de páginas que no han cambiado desde la última ejecución
+    use_parse_cache: bool = True
+    parse_cache_dir: str = "data/parse_cache"
+    # Bits de simhash (de 64) para considerar una página casi idéntica; None lo desactiva
+    near_duplicate_max_distance: Optional[int] = 3
+    # Instantánea columnar (Parquet/NPZ) de cada dataset para análisis histórico
+    columnar_export: bool = True
+
+def resolve_html_parser(name: str) -> str:
+    """Backend pedido si está instalado; si no, el html.parser de la stdlib"""
+    try:
+        BeautifulSoup('', name)
+        return name
+    except FeatureNotFound:
+        logger.warning(f"HTML parser '{name}' not available, falling back to html.parser")
+        return 'html.parser'
+
+class ResponseTooLargeError(Exception):
+    """La respuesta supera max_response_bytes"""
+
+@dataclass
+class FetchResult:
+    """Página descargada: bytes crudos más la codificación declarada"""
+    url: str
+    body: bytes
+    encoding: Optional[str] = None
+    status: int = 200
+    stats: Dict = field(default_factory=dict)
+    fetched_at: Optional[str] = None  # Fecha original de la respuesta (p.ej. en replay)
+    
+    def record_decode(self, seconds: float):
+        """Acumula el tiempo de decodificación/parseo de esta petición"""
+        self.stats['decode_seconds'] = round(self.stats.get('decode_seconds', 0.0) + seconds, 4)
+    
+    def text(self) -> str:
+        """Decodifica el cuerpo con la codificación declarada (UTF-8 por defecto)"""
+        start = time.perf_counter()
+        try:
+            content = self.body.decode(self.encoding or 'utf-8', errors='replace')
+        except LookupError:  # Charset declarado desconocido
+            content = self.body.decode('utf-8', errors='replace')
+        self.record_decode(time.perf_counter() - start)
+        return content
+    
+    def reuse(self, stats: Dict) -> 'FetchResult':
+        """Copia ligera que comparte el cuerpo pero con estadísticas propias"""
+        return FetchResult(self.url, self.body, self.encoding, self.status, stats, self.fetched_at)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Interpreta Retry-After en segundos o como fecha HTTP"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class CircuitBreaker:
+    """Deja de pedir a un host tras N fallos consecutivos durante el resto de la ejecución"""
+    
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self.failures: Dict[str, int] = {}
+        self.open_hosts = set()
+        self.short_circuited = 0
+    
+    def is_open(self, host: str) -> bool:
+        """Indica si el host ya no debe recibir más peticiones"""
+        return host in self.open_hosts
+    
+    def record_success(self, host: str):
+        """Una respuesta válida reinicia el contador de fallos"""
+        self.failures[host] = 0
+    
+    def record_failure(self, host: str):
+        """Cuenta un fallo y abre el circuito al alcanzar el umbral"""
+        self.failures[host] = self.failures.get(host, 0) + 1
+        if self.failures[host] >= self.threshold and host not in self.open_hosts:
+            self.open_hosts.add(host)
+            logger.error(f"🔌 Circuit opened for {host} after {self.failures[host]} consecutive failures")
+
+class InFlightRequest:
+    """Petición en curso compartida por todas las corrutinas que piden la misma URL"""
+    
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
 
 class RateLimiter:
-    """Rate limiter para controlar la velocidad de requests"""
+    """Rate limiter (token bucket) para controlar la velocidad de requests"""
     
-    def __init__(self, max_requests_per_second: float):
+    def __init__(self, max_requests_per_second: float, burst: int = 1):
         self.max_requests_per_second = max_requests_per_second
         self.min_interval = 1.0 / max_requests_per_second
-        self.last_request_time = 0.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self._lock = None
+    
+    def _refill(self):
+        """Repone tokens según el tiempo transcurrido"""
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.max_requests_per_second)
+        self.last_refill = now
     
     async def wait_if_needed(self):
         """Espera si es necesario para respetar el rate limit"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        if time_since_last < self.min_interval:
-            sleep_time = self.min_interval - time_since_last
-            await asyncio.sleep(sleep_time)
+        # El lock se crea perezosamente para quedar ligado al event loop activo
+        if self._lock is None:
+            self._lock = asyncio.Lock()
         
-        self.last_request_time = time.time()
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1.0:
+                sleep_time = (1.0 - self.tokens) / self.max_requests_per_second
+                await asyncio.sleep(sleep_time)
+                self._refill()
+            self.tokens -= 1.0
+    
+    def pause(self, seconds: float):
+        """Retrasa el siguiente token al menos `seconds` (p.ej. por Retry-After)"""
+        self._refill()
+        self.tokens = min(self.tokens, 1.0 - seconds * self.max_requests_per_second)
+
+class AdaptiveRateLimiter(RateLimiter):
+    """Token bucket AIMD: sube el ritmo con respuestas sanas y lo recorta ante 429/503"""
+    
+    def __init__(self, initial_rate: float, config: 'ScrapingConfig'):
+        super().__init__(initial_rate, config.rate_limit_burst)
+        self.min_rate = config.adaptive_min_rps
+        self.max_rate = config.adaptive_max_rps
+        self.increase = config.adaptive_increase_rps
+        self.decrease_factor = config.adaptive_decrease_factor
+        self.latency_threshold = config.adaptive_latency_threshold
+        self._set_rate(initial_rate)
+    
+    def _set_rate(self, rate: float):
+        self._refill()  # Los tokens acumulados se calculan con el ritmo anterior
+        self.max_requests_per_second = min(self.max_rate, max(self.min_rate, rate))
+        self.min_interval = 1.0 / self.max_requests_per_second
+    
+    def observe(self, latency: Optional[float], status: Optional[int]):
+        """Ajusta el ritmo según la última respuesta (status None = timeout/error)"""
+        if status is None or status in (429, 503):
+            self._set_rate(self.max_requests_per_second * self.decrease_factor)
+        elif status < 500 and latency is not None and latency <= self.latency_threshold:
+            self._set_rate(self.max_requests_per_second + self.increase)
+        # Latencia alta o 5xx: mantener el ritmo actual
+
+class HostRateLimiter:
+    """Mantiene un token bucket independiente por host"""
+    
+    def __init__(self, config: 'ScrapingConfig'):
+        self.config = config
+        self.max_requests_per_second = config.max_requests_per_second
+        self.burst = config.rate_limit_burst
+        self.adaptive = config.adaptive_rate_limit
+        self.buckets: Dict[str, RateLimiter] = {}
+        self.learned_rates: Dict[str, float] = self._load_state() if self.adaptive else {}
+    
+    def _load_state(self) -> Dict[str, float]:
+        """Carga el ritmo aprendido por host en ejecuciones anteriores"""
+        path = self.config.rate_state_path
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return {host: float(rate) for host, rate in json.load(f).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable rate state: {e}")
+            return {}
+    
+    def save_state(self):
+        """Persiste el ritmo actual de cada host para la próxima ejecución"""
+        if not self.adaptive or not self.config.rate_state_path:
+            return
+        self.learned_rates.update(self.current_rates())
+        try:
+            os.makedirs(os.path.dirname(self.config.rate_state_path) or '.', exist_ok=True)
+            with open(self.config.rate_state_path, 'w', encoding='utf-8') as f:
+                json.dump(self.learned_rates, f, indent=2, sort_keys=True)
+        except OSError as e:
+            logger.warning(f"Could not save rate state: {e}")
+    
+    def current_rates(self) -> Dict[str, float]:
+        """Ritmo actual (requests/s) de cada host usado en esta ejecución"""
+        return {host: round(bucket.max_requests_per_second, 4) for host, bucket in self.buckets.items()}
+    
+    def for_host(self, host: str) -> RateLimiter:
+        """Devuelve (o crea) el bucket de un host"""
+        if host not in self.buckets:
+            if self.adaptive:
+                initial_rate = self.learned_rates.get(host, self.max_requests_per_second)
+                self.buckets[host] = AdaptiveRateLimiter(initial_rate, self.config)
+            else:
+                self.buckets[host] = RateLimiter(self.max_requests_per_second, self.burst)
+        return self.buckets[host]
+    
+    def interval_for(self, url: str) -> float:
+        """Intervalo actual entre requests para el host de la URL"""
+        return self.for_host(urlparse(url).netloc).min_interval
+    
+    def observe(self, url: str, latency: Optional[float], status: Optional[int]):
+        """Informa del resultado de una petición al limitador adaptativo del host"""
+        bucket = self.for_host(urlparse(url).netloc)
+        if isinstance(bucket, AdaptiveRateLimiter):
+            bucket.observe(latency, status)
+    
+    async def wait_if_needed(self, url: str = ""):
+        """Espera el turno del host de la URL; hosts distintos no se bloquean entre sí"""
+        await self.for_host(urlparse(url).netloc).wait_if_needed()
 
 class RobotsTxtChecker:
     """Verificador de robots.txt para respetar las directivas"""
     
-    def __init__(self):
+    def __init__(self, cache_path: Optional[str] = None, ttl_hours: float = 24, error_ttl_minutes: float = 5):
         self.robots_cache = {}
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_hours * 3600
+        self.error_ttl_seconds = error_ttl_minutes * 60
+        # Cuándo hay que volver a cargar las reglas de cada host (procesos de larga vida)
+        self._expires_at: Dict[str, float] = {}
+        self._pending = {}
+        self._disk_cache = self._load_disk_cache()
+    
+    @staticmethod
+    def _base_url(url: str) -> str:
+        parsed_url = urlparse(url)
+        return f"{parsed_url.scheme}://{parsed_url.netloc}"
+    
+    def _load_disk_cache(self) -> Dict:
+        """Carga las reglas persistidas de ejecuciones anteriores"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable robots.txt cache: {e}")
+            return {}
+    
+    def save(self):
+        """Persiste las reglas descargadas para las siguientes ejecuciones"""
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._disk_cache, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save robots.txt cache: {e}")
+    
+    @staticmethod
+    def _build_parser(robots_url: str, status: int, lines: List[str]) -> RobotFileParser:
+        """Construye el parser con la misma semántica que RobotFileParser.read()"""
+        rp = RobotFileParser()
+        rp.set_url(robots_url)
+        if status in (401, 403):
+            rp.disallow_all = True
+        elif 400 <= status < 500:
+            rp.allow_all = True
+        elif status == 200:
+            rp.parse(lines)
+        return rp
+    
+    async def load(self, url: str, session: aiohttp.ClientSession, timeout: float):
+        """Carga robots.txt del host de la URL sin bloquear el event loop"""
+        base_url = self._base_url(url)
+        if base_url in self.robots_cache and time.time() < self._expires_at.get(base_url, 0):
+            return
+        
+        # Reutilizar reglas persistidas mientras no caduquen
+        cached = self._disk_cache.get(base_url)
+        if cached and time.time() - cached['fetched_at'] < self.ttl_seconds:
+            self.robots_cache[base_url] = self._build_parser(
+                urljoin(base_url, '/robots.txt'), cached['status'], cached['lines']
+            )
+            self._expires_at[base_url] = cached['fetched_at'] + self.ttl_seconds
+            return
+        
+        # Un único fetch por host aunque varias corrutinas lo pidan a la vez
+        task = self._pending.get(base_url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(base_url, session, timeout))
+            self._pending[base_url] = task
+            task.add_done_callback(lambda _: self._pending.pop(base_url, None))
+        await asyncio.shield(task)
+    
+    async def _fetch(self, base_url: str, session: aiohttp.ClientSession, timeout: float):
+        """Descarga y parsea robots.txt a través de la sesión compartida"""
+        robots_url = urljoin(base_url, '/robots.txt')
+        try:
+            async with session.get(robots_url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                status = response.status
+                lines = []
+                if status == 200:
+                    text = await response.text(encoding='utf-8', errors='replace')
+                    lines = text.splitlines()
+        except Exception as e:
+            # Si no podemos verificar, asumimos que está permitido (sin persistir)
+            logger.warning(f"Error fetching robots.txt for {base_url}: {e}")
+            rp = RobotFileParser()
+            rp.set_url(robots_url)
+            rp.allow_all = True
+            self.robots_cache[base_url] = rp
+            # Reintentar pasados unos minutos, no antes de cada página
+            self._expires_at[base_url] = time.time() + self.error_ttl_seconds
+            return
+        
+        self.robots_cache[base_url] = self._build_parser(robots_url, status, lines)
+        # Los 5xx son transitorios: se respetan unos minutos pero no se persisten
+        self._expires_at[base_url] = time.time() + self.error_ttl_seconds
+        if status < 500:
+            self._expires_at[base_url] = time.time() + self.ttl_seconds
+            self._disk_cache[base_url] = {
+                'fetched_at': time.time(),
+                'status': status,
+                'lines': lines
+            }
+            self.save()
+    
+    async def prefetch(self, urls: List[str], session: aiohttp.ClientSession, timeout: float):
+        """Precarga en paralelo robots.txt de todos los hosts indicados"""
+        base_urls = {self._base_url(url): url for url in urls}
+        await asyncio.gather(*(
+            self.load(url, session, timeout) for url in base_urls.values()
+        ))
     
     def can_fetch(self, url: str, user_agent: str) -> bool:
         """Verifica si podemos hacer scraping de la URL según robots.txt"""
         try:
-            parsed_url = urlparse(url)
-            base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-            
+            base_url = self._base_url(url)
             if base_url not in self.robots_cache:
-                robots_url = urljoin(base_url, '/robots.txt')
-                rp = RobotFileParser()
-                rp.set_url(robots_url)
-                rp.read()
-                self.robots_cache[base_url] = rp
+                logger.warning(f"robots.txt not loaded for {base_url}, call load() first")
+                return True
             
             return self.robots_cache[base_url].can_fetch(user_agent, url)
         except Exception as e:
@@ -87,14 +449,40 @@ class EthicalScraper:
     
     def __init__(self, config: ScrapingConfig):
         self.config = config
-        self.rate_limiter = RateLimiter(config.max_requests_per_second)
-        self.robots_checker = RobotsTxtChecker()
+        self.rate_limiter = HostRateLimiter(config)
+        self.robots_checker = RobotsTxtChecker(
+            config.robots_cache_path, config.robots_cache_hours, config.robots_error_cache_minutes
+        )
         self.session = None
-        self.cache = {}
+        self.cache = MemoryPageCache(config.memory_cache_max_bytes, config.memory_cache_ttl_seconds)
+        self.request_log: List[Dict] = []
+        self._inflight: Dict[str, InFlightRequest] = {}
+        self.coalesced_requests = 0
+        self.stage_timings: Dict[str, float] = {}
+        self.circuit_breaker = CircuitBreaker(config.circuit_breaker_threshold)
+        self.recorder = ResponseRecorder(config.record_archive) if config.record_archive else None
+        self.http_cache = (
+            HttpCache(config.cache_dir, config.cache_duration_hours)
+            if config.use_disk_cache else None
+        )
+        self.html_parser = resolve_html_parser(config.html_parser)
+        self.parse_pool = (
+            ParsePool(config.parse_workers, config.parse_timeout_seconds)
+            if config.parse_workers > 0 else None
+        )
+        self.parse_cache = (
+            ParseResultCache(config.parse_cache_dir, SCRAPER_VERSION)
+            if config.use_parse_cache else None
+        )
     
     async def __aenter__(self):
         """Context manager entry"""
-        connector = aiohttp.TCPConnector(limit=10, limit_per_host=2)
+        connector = aiohttp.TCPConnector(
+            limit=10,
+            limit_per_host=2,
+            ttl_dns_cache=self.config.dns_cache_seconds,
+            keepalive_timeout=self.config.keepalive_seconds
+        )
         timeout = aiohttp.ClientTimeout(total=self.config.request_timeout)
         headers = {
             'User-Agent': self.config.user_agent,
@@ -116,55 +504,314 @@ class EthicalScraper:
         """Context manager exit"""
         if self.session:
             await self.session.close()
+        self.rate_limiter.save_state()
+        if self.recorder:
+            self.recorder.close()
+        if self.parse_pool:
+            self.parse_pool.close()
+    
+    async def prefetch_robots(self, urls: List[str]):
+        """Precarga robots.txt de los hosts de los targets antes de empezar"""
+        if self.config.respect_robots_txt:
+            await self.robots_checker.prefetch(urls, self.session, self.config.request_timeout)
+    
+    def start_run(self):
+        """Reinicia el estado por ejecución; sesión, caches y robots.txt se conservan"""
+        self.request_log = []
+        self.coalesced_requests = 0
+        self.stage_timings = {}
+        self.circuit_breaker = CircuitBreaker(self.config.circuit_breaker_threshold)
+    
+    def provider_budget(self, deadline: Optional[float] = None) -> float:
+        """Segundos disponibles para un proveedor: su límite propio o lo que quede de la ejecución"""
+        budget = self.config.provider_deadline_seconds
+        if deadline is not None:
+            budget = min(budget, deadline - asyncio.get_running_loop().time())
+        return max(0.0, budget)
+    
+    def get_stats(self) -> Dict:
+        """Estadísticas del scraper para el resumen de la ejecución"""
+        stats = {
+            'requests': list(self.request_log),
+            'bytes_downloaded': sum(entry['bytes'] for entry in self.request_log if entry['source'] == 'network'),
+            'decode_seconds': round(sum(entry['decode_seconds'] for entry in self.request_log), 4),
+            'coalesced': self.coalesced_requests,
+            'memory_cache': self.cache.get_stats(),
+            'stage_seconds': {stage: round(seconds, 4) for stage, seconds in self.stage_timings.items()},
+            'rate_limits': self.rate_limiter.current_rates(),
+            'circuit_breaker': {
+                'open_hosts': sorted(self.circuit_breaker.open_hosts),
+                'short_circuited': self.circuit_breaker.short_circuited
+            }
+        }
+        if self.http_cache:
+            stats['http_cache'] = dict(self.http_cache.stats)
+        if self.parse_pool:
+            stats['parse_pool'] = dict(self.parse_pool.stats)
+        if self.parse_cache:
+            stats['parse_cache'] = dict(self.parse_cache.stats, fingerprints=dict(self.parse_cache.fingerprints))
+        return stats
+    
+    def _log_request(self, url: str, source: str, status: int, size: int, elapsed: float) -> Dict:
+        """Registra una respuesta servida (red o cache) para las estadísticas"""
+        entry = {
+            'url': url,
+            'source': source,
+            'status': status,
+            'bytes': size,
+            'elapsed_seconds': round(elapsed, 4),
+            'decode_seconds': 0.0
+        }
+        self.request_log.append(entry)
+        return entry
+    
+    def _record(self, url: str, status: int, reason: str, headers, body: bytes, elapsed: float):
+        """Graba la respuesta en el archivo WARC si la grabación está activa"""
+        if self.recorder:
+            try:
+                self.recorder.record(url, status, reason, headers, body, elapsed)
+            except OSError as e:
+                logger.warning(f"Could not record response for {url}: {e}")
+    
+    def _record_cached(self, page: FetchResult, cache_status: str):
+        """Graba el cuerpo servido desde cache para que el archivo sea re-parseable"""
+        if self.recorder:
+            headers = {'X-Cache': cache_status}
+            if page.encoding:
+                headers['Content-Type'] = f"text/html; charset={page.encoding}"
+            self._record(page.url, 200, 'OK', headers, page.body, 0.0)
+    
+    @contextmanager
+    def timed(self, stage: str):
+        """Acumula el tiempo de una etapa (fetch, parse, extract, serialize)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_timings[stage] = self.stage_timings.get(stage, 0.0) + time.perf_counter() - start
+    
+    async def parse_page(self, provider: str, config: Dict, page: FetchResult,
+                         record_type, build, build_structured=None) -> List:
+        """Extrae los registros de una página en el pool de procesos (o en línea si parse_workers=0)"""
+        # build(plan, soup, config) recorre el DOM; build_structured(offers, config) se prueba antes
+        # Página sin cambios reales (ni plan ni versión nuevos): no se vuelve a parsear
+        if self.parse_cache:
+            body_hash = content_hash(page.body)
+            version = plan_version(config)
+            fingerprint = None
+            cached = self.parse_cache.get(provider, body_hash, version)
+            # Solo cambió el boilerplate (banner, nonce, widget): tampoco se parsea
+            max_distance = self.config.near_duplicate_max_distance
+            if cached is None and max_distance is not None:
+                # El simhash es Python puro (tanto como un parseo lxml): también fuera del loop
+                patterns = value_patterns(config)
+                if self.parse_pool:
+                    fingerprint = await self.parse_pool.run(page_fingerprint, page.body, page.encoding, patterns)
+                else:
+                    fingerprint = page_fingerprint(page.body, page.encoding, patterns)
+                cached = self.parse_cache.get_similar(provider, fingerprint, version, max_distance)
+            if cached is not None:
+                return [record_type(**record) for record in cached]
+        
+        args = (build, build_structured, provider, config, page.body, page.encoding, self.html_parser)
+        if self.parse_pool:
+            records, timings = await self.parse_pool.run(extract_page, *args)
+        else:
+            records, timings = extract_page(*args)
+        page.record_decode(timings.get('parse', 0.0))
+        if 'structured' in timings:
+            logger.info(f"📦 Structured data found for {provider}, DOM extraction skipped")
+        for stage, seconds in timings.items():
+            self.stage_timings[stage] = self.stage_timings.get(stage, 0.0) + seconds
+        
+        if self.parse_cache:
+            # Sin last_updated: al reutilizarlos se fechan con la ejecución que los sirve
+            stored = [asdict(record) for record in records]
+            for record in stored:
+                record.pop('last_updated', None)
+            self.parse_cache.put(provider, body_hash, version, stored, fingerprint)
+        return records
     
     async def fetch_page(self, url: str, retries: int = None) -> Optional[str]:
-        """Obtiene una página web respetando rate limits y robots.txt"""
+        """Obtiene una página web decodificada como texto"""
+        page = await self.fetch_bytes(url, retries)
+        return page.text() if page else None
+    
+    async def _read_body(self, response: aiohttp.ClientResponse) -> bytes:
+        """Lee el cuerpo en streaming respetando max_response_bytes"""
+        limit = self.config.max_response_bytes
+        if response.content_length is not None and response.content_length > limit:
+            raise ResponseTooLargeError(f"Content-Length {response.content_length} exceeds {limit} bytes")
+        
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(self.config.stream_chunk_size):
+            size += len(chunk)
+            if size > limit:
+                raise ResponseTooLargeError(f"Body exceeds {limit} bytes")
+            chunks.append(chunk)
+        return b''.join(chunks)
+    
+    async def fetch_bytes(self, url: str, retries: int = None) -> Optional[FetchResult]:
+        """Obtiene los bytes crudos de una página, compartiendo peticiones en curso"""
+        flight = self._inflight.get(url)
+        joined = flight is not None
+        if joined:
+            # Otra corrutina ya está pidiendo esta URL: esperar su respuesta
+            self.coalesced_requests += 1
+            logger.info(f"Joining in-flight request for: {url}")
+        else:
+            flight = InFlightRequest(asyncio.ensure_future(self._fetch_with_deadline(url, retries)))
+            self._inflight[url] = flight
+            flight.task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        
+        flight.waiters += 1
+        try:
+            page = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()  # Nadie espera ya el resultado
+        
+        if joined and page:
+            return page.reuse(self._log_request(url, 'coalesced', page.status, len(page.body), 0.0))
+        return page
+    
+    async def _fetch_with_deadline(self, url: str, retries: int = None) -> Optional[FetchResult]:
+        """Limita el fetch completo de una URL (reintentos y esperas incluidos)"""
+        try:
+            return await asyncio.wait_for(
+                self._fetch_bytes(url, retries), timeout=self.config.request_deadline_seconds
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"⏰ Request deadline ({self.config.request_deadline_seconds}s) exceeded for {url}")
+            return None
+    
+    async def _fetch_bytes(self, url: str, retries: int = None) -> Optional[FetchResult]:
+        """Obtiene los bytes crudos de una página respetando rate limits y robots.txt"""
         if retries is None:
             retries = self.config.max_retries
         
         # Verificar robots.txt si está habilitado
         if self.config.respect_robots_txt:
+            await self.robots_checker.load(url, self.session, self.config.request_timeout)
             if not self.robots_checker.can_fetch(url, self.config.user_agent):
                 logger.warning(f"Robots.txt disallows scraping: {url}")
                 return None
         
-        # Verificar cache
-        cache_key = f"{url}_{datetime.now().strftime('%Y%m%d%H')}"
-        if cache_key in self.cache:
+        # Verificar cache en memoria
+        cached = self.cache.get(url)
+        if cached is not None:
             logger.info(f"Using cached data for: {url}")
-            return self.cache[cache_key]
+            body, entry = cached
+            return FetchResult(url, body, entry.encoding,
+                               stats=self._log_request(url, 'memory', 200, len(body), 0.0))
         
+        # Verificar cache en disco (fresca → sin red, salvo revalidate_disk_cache;
+        # caducada → GET condicional, un 304 reutiliza el cuerpo guardado)
+        cache_entry = None
+        if self.http_cache:
+            fresh = None if self.config.revalidate_disk_cache else self.http_cache.get_fresh(url)
+            if fresh is not None:
+                logger.info(f"Using disk cache for: {url}")
+                entry, body = fresh
+                page = FetchResult(url, body, entry.encoding,
+                                   stats=self._log_request(url, 'disk_cache', 200, len(body), 0.0))
+                self._record_cached(page, 'HIT')
+                self.cache.put(url, body, page.encoding)
+                return page
+            cache_entry = self.http_cache.lookup(url)
+        request_headers = self.http_cache.conditional_headers(cache_entry) if self.http_cache else {}
+        
+        host = urlparse(url).netloc
         for attempt in range(retries + 1):
+            # Host caído: fallar rápido durante el resto de la ejecución
+            if self.circuit_breaker.is_open(host):
+                self.circuit_breaker.short_circuited += 1
+                logger.warning(f"Circuit open for {host}, skipping {url}")
+                return None
+            
+            retry_after = None
             try:
-                # Rate limiting
-                await self.rate_limiter.wait_if_needed()
+                # Rate limiting por host
+                await self.rate_limiter.wait_if_needed(url)
                 
                 # Añadir jitter aleatorio para parecer más humano
-                jitter = random.uniform(0.1, 0.5)
+                if self.config.adaptive_rate_limit:
+                    # Proporcional al ritmo aprendido: hosts rápidos, jitter pequeño
+                    jitter = random.uniform(0.0, 0.25 * self.rate_limiter.interval_for(url))
+                else:
+                    jitter = random.uniform(0.1, 0.5)
                 await asyncio.sleep(jitter)
                 
                 logger.info(f"Fetching: {url} (attempt {attempt + 1})")
                 
-                async with self.session.get(url) as response:
+                start = time.perf_counter()
+                async with self.session.get(url, headers=request_headers) as response:
+                    self.rate_limiter.observe(url, time.perf_counter() - start, response.status)
+                    if response.status in (200, 304):
+                        self.circuit_breaker.record_success(host)
+                    
                     if response.status == 200:
-                        content = await response.text()
+                        body = await self._read_body(response)
+                        elapsed = time.perf_counter() - start
+                        self._record(url, response.status, response.reason, response.headers, body, elapsed)
+                        logger.info(f"Fetched {url}: {len(body)} bytes in {elapsed:.2f}s")
+                        page = FetchResult(url, body, response.charset,
+                                           stats=self._log_request(url, 'network', 200, len(body), elapsed))
                         # Cachear el resultado
-                        self.cache[cache_key] = content
-                        return content
-                    elif response.status == 429:  # Too Many Requests
-                        wait_time = self.config.retry_delay * (2 ** attempt)
-                        logger.warning(f"Rate limited, waiting {wait_time}s")
-                        await asyncio.sleep(wait_time)
+                        self.cache.put(url, body, page.encoding)
+                        if self.http_cache:
+                            self.http_cache.store(url, body, response.headers, response.charset)
+                        return page
+                    
+                    if response.status == 304 and cache_entry:  # Not Modified
+                        logger.info(f"Not modified, reusing cached body: {url}")
+                        body = self.http_cache.revalidate(cache_entry, response.headers)
+                        page = FetchResult(url, body, cache_entry.encoding,
+                                           stats=self._log_request(url, 'revalidated', 304, len(body),
+                                                                   time.perf_counter() - start))
+                        self._record_cached(page, 'REVALIDATED')
+                        self.cache.put(url, body, page.encoding)
+                        return page
+                    
+                    # El resto de respuestas se graban sin cuerpo
+                    self._record(url, response.status, response.reason, response.headers, b'',
+                                 time.perf_counter() - start)
+                    if response.status in (429, 503):  # Too Many Requests / Unavailable
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        logger.warning(f"HTTP {response.status} for {url} (Retry-After: {retry_after})")
+                        self.circuit_breaker.record_failure(host)
+                        if retry_after is not None:
+                            # Frenar también al resto de peticiones a este host
+                            self.rate_limiter.for_host(host).pause(retry_after)
                     else:
                         logger.warning(f"HTTP {response.status} for {url}")
+                        if response.status >= 500:
+                            self.circuit_breaker.record_failure(host)
                         
+            except ResponseTooLargeError as e:
+                # Reintentar no cambia el tamaño de la respuesta
+                logger.error(f"Response too large for {url}: {e}")
+                return None
             except asyncio.TimeoutError:
                 logger.warning(f"Timeout for {url} (attempt {attempt + 1})")
+                self.circuit_breaker.record_failure(host)
+                self.rate_limiter.observe(url, None, None)
             except Exception as e:
                 logger.error(f"Error fetching {url}: {e}")
+                self.circuit_breaker.record_failure(host)
+                self.rate_limiter.observe(url, None, None)
             
-            if attempt < retries:
-                wait_time = self.config.retry_delay * (2 ** attempt)
+            if attempt < retries and not self.circuit_breaker.is_open(host):
+                # Una sola espera por intento: Retry-After si el servidor lo indica
+                if retry_after is not None:
+                    if retry_after > self.config.max_retry_after:
+                        logger.error(f"Retry-After {retry_after}s exceeds limit for {url}, giving up")
+                        return None
+                    wait_time = retry_after
+                else:
+                    wait_time = self.config.retry_delay * (2 ** attempt)
                 logger.info(f"Retrying in {wait_time}s...")
                 await asyncio.sleep(wait_time)
         
@@ -180,15 +827,15 @@ class DataValidator:
         if not price_str:
             return None
         
-        # Extraer número y moneda
+        # Extraer número y moneda ('3.995 kr.' son 3995 kr: el '.' danés separa miles)
         import re
-        price_match = re.search(r'(\d+(?:[.,]\d+)?)\s*(?:kr|DKK)', price_str, re.IGNORECASE)
+        price_match = re.search(rf'({DANISH_NUMBER})\s*(?:kr|DKK)', price_str, re.IGNORECASE)
         if price_match:
-            price_value = float(price_match.group(1).replace(',', '.'))
+            price_value = parse_danish_number(price_match.group(1))
             return {
                 'value': price_value,
                 'currency': 'DKK',
-                'formatted': f"{price_value:,.0f} kr."
+                'formatted': f"{format_kr(price_value)} kr."
             }
         return None
     
@@ -216,6 +863,24 @@ class DataManager:
         self.data_dir = data_dir
         os.makedirs(data_dir, exist_ok=True)
         os.makedirs(f"{data_dir}/backups", exist_ok=True)
+        self.start_run()
+    
+    def start_run(self):
+        """Reinicia las estadísticas de serialización (una vez por job)"""
+        self.serialization_stats = {
+            'backend': JSON_BACKEND,
+            'records': 0,
+            'bytes': 0,
+            'seconds': 0.0
+        }
+    
+    def get_serialization_stats(self) -> Dict:
+        """Registros y bytes serializados y su throughput"""
+        stats = dict(self.serialization_stats)
+        seconds = stats['seconds']
+        stats['records_per_second'] = round(stats['records'] / seconds) if seconds else 0
+        stats['mib_per_second'] = round(stats['bytes'] / 2 ** 20 / seconds, 2) if seconds else 0.0
+        return stats
     
     def backup_current_data(self, filename: str):
         """Crea backup de los datos actuales"""
@@ -227,25 +892,92 @@ class DataManager:
             shutil.copy2(source_path, backup_path)
             logger.info(f"Backup created: {backup_path}")
     
-    def save_data(self, filename: str, data: List[Dict]):
-        """Guarda datos con backup automático"""
+    def _write(self, filepath: str, payload: bytes):
+        """Escritura atómica: la web nunca lee un archivo a medias"""
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, filepath)
+    
+    def save_data(self, filename: str, data: List[Dict], generated_at: Optional[str] = None,
+                  minified: bool = False) -> int:
+        """Guarda datos con backup automático; con minified, también <nombre>.min.json para la web"""
         self.backup_current_data(filename)
         
         # Añadir metadatos
         enriched_data = {
             'data': data,
             'metadata': {
-                'last_updated': datetime.now().isoformat(),
+                'last_updated': generated_at or datetime.now().isoformat(),
                 'total_records': len(data),
-                'scraper_version': '1.0.0'
+                'scraper_version': SCRAPER_VERSION
             }
         }
         
         filepath = f"{self.data_dir}/{filename}"
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(enriched_data, f, ensure_ascii=False, indent=2)
+        payload = dumps(enriched_data, pretty=True)
+        self._write(filepath, payload)
+        written = len(payload)
+        
+        if minified:
+            root, ext = os.path.splitext(filepath)
+            payload = dumps(enriched_data)
+            self._write(f"{root}.min{ext}", payload)
+            written += len(payload)
         
         logger.info(f"Data saved to {filepath} ({len(data)} records)")
+        return written
+    
+    def save_records(self, filename: str, records: List, generated_at: Optional[str] = None) -> List[Dict]:
+        """Serializa registros según su esquema y guarda la versión legible y la minificada"""
+        start = time.perf_counter()
+        data = serialize_records(records)
+        written = self.save_data(filename, data, generated_at, minified=True)
+        self.serialization_stats['records'] += len(data)
+        self.serialization_stats['bytes'] += written
+        self.serialization_stats['seconds'] += time.perf_counter() - start
+        return data
+    
+    def save_columnar(self, dataset: str, records: List, generated_at: Optional[str] = None) -> Optional[str]:
+        """Guarda los registros como instantánea columnar tipada (Parquet, o NPZ sin pyarrow)"""
+        if not records:
+            return None
+        directory = f"{self.data_dir}/columnar/{dataset}"
+        os.makedirs(directory, exist_ok=True)
+        try:
+            path = write_snapshot(f"{directory}/{snapshot_name(generated_at)}", records)
+        except Exception as e:
+            # El JSON ya está guardado: un fallo aquí no invalida la ejecución
+            logger.warning(f"Could not write columnar snapshot for {dataset}: {e}")
+            return None
+        logger.info(f"📊 Columnar snapshot saved to {path} ({len(records)} records, {COLUMNAR_FORMAT})")
+        return path
+    
+    def load_columnar(self, dataset: str, columns: Optional[List[str]] = None):
+        """DataFrame con la última instantánea de un dataset (solo las columnas pedidas)"""
+        snapshots = list_snapshots(f"{self.data_dir}/columnar/{dataset}")
+        if not snapshots:
+            raise FileNotFoundError(f"No columnar snapshots for {dataset} in {self.data_dir}/columnar")
+        return read_snapshot(snapshots[-1], columns)
+    
+    def load_history(self, dataset: str, columns: Optional[List[str]] = None,
+                     since: Optional[Union[str, datetime]] = None):
+        """DataFrame con todas las instantáneas de un dataset y una columna `snapshot` (UTC)"""
+        import pandas as pd
+        
+        # `since` sin zona horaria se interpreta en UTC, como los nombres de las instantáneas
+        since = to_utc(since) if since else None
+        frames = []
+        for path in list_snapshots(f"{self.data_dir}/columnar/{dataset}"):
+            taken_at = snapshot_time(path)
+            if since and taken_at < since:
+                continue
+            frame = read_snapshot(path, columns)
+            frame.insert(0, 'snapshot', pd.Timestamp(taken_at))
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=['snapshot'] + list(columns or []))
+        return pd.concat(frames, ignore_index=True)
 
 async def main():
     """Función principal del scraper"""
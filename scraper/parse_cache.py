@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+🧾 Cache de resultados de extracción por hash de contenido
+Si el cuerpo de una página (sin tokens volátiles) no ha cambiado desde la
+última ejecución, y tampoco el plan de extracción ni la versión del scraper,
+se reutilizan los registros guardados sin volver a parsear. Si solo cambia
+el boilerplate (banners, widgets), un simhash del texto visible lo detecta
+"""
+
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+from structured_data import find_offers
+
+logger = logging.getLogger(__name__)
+
+# Fragmentos que cambian en cada petición sin que cambie el contenido
+_VOLATILE_PATTERNS = [
+    # Inputs/metas con tokens CSRF
+    (re.compile(rb'<(?:input|meta)\b[^>]*(?:csrf|xsrf|authenticity_token|requestverificationtoken)[^>]*>', re.I), b''),
+    # Nonces e integrity de scripts y estilos
+    (re.compile(rb'\b(nonce|integrity)=(?:"[^"]*"|\'[^\']*\')', re.I), rb'\1=""'),
+    # Tokens y build ids dentro de JSON embebido
+    (re.compile(rb'"(csrfToken|csrf_token|xsrfToken|nonce|buildId|requestId)"\s*:\s*"[^"]*"', re.I), rb'"\1":""'),
+    # Fechas/horas ISO 8601 y epochs (s o ms)
+    (re.compile(rb'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?'), b'<ts>'),
+    (re.compile(rb'\b1\d{9}(?:\d{3})?\b'), b'<ts>'),
+    # Cache busters en URLs de recursos
+    (re.compile(rb'([?&](?:v|ver|_|t|ts|cb|cachebust)=)[\w.-]+', re.I), rb'\1'),
+]
+
+def normalize_body(body: bytes) -> bytes:
+    """Elimina tokens CSRF, nonces, timestamps y cache busters"""
+    for pattern, replacement in _VOLATILE_PATTERNS:
+        body = pattern.sub(replacement, body)
+    return body
+
+def content_hash(body: bytes) -> str:
+    """sha256 del cuerpo normalizado"""
+    return hashlib.sha256(normalize_body(body)).hexdigest()
+
+# Zonas que nunca contienen productos; se quitan con regex para no parsear
+_CHROME = re.compile(rb'<(script|style|noscript|svg|template|head|header|footer|nav|aside)\b.*?</\1\s*>', re.I | re.S)
+# Sin texto de página; el resto de zonas (también cabecera, menús y pie) puede tener precios
+_SCRIPTS = re.compile(rb'<(script|style|noscript|svg|template)\b.*?</\1\s*>', re.I | re.S)
+_TAG = re.compile(rb'<[^>]+>')
+_WORD = re.compile(r'\w+')
+# Cifras (precios, cuotas, plazos, kilometraje): cualquier cambio obliga a re-extraer
+_NUMBER = re.compile(r'\d+(?:[.,\s]\d+)*')
+
+def _text_of(stripped: bytes, encoding: Optional[str]) -> str:
+    try:
+        text = stripped.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        text = stripped.decode('utf-8', errors='replace')
+    return ' '.join(html.unescape(text).split())
+
+def visible_text(body: bytes, encoding: Optional[str] = None) -> str:
+    """Texto visible de las zonas candidatas (sin scripts, cabecera, menús ni pie)"""
+    return _text_of(_TAG.sub(b' ', _CHROME.sub(b' ', body)), encoding)
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """Simhash de 64 bits sobre shingles de palabras"""
+    words = _WORD.findall(text.lower())
+    grams = Counter(' '.join(words[i:i + shingle]) for i in range(max(1, len(words) - shingle + 1)))
+    vector = [0] * 64
+    for gram, weight in grams.items():
+        value = int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            vector[bit] += weight if value >> bit & 1 else -weight
+    return sum(1 << bit for bit in range(64) if vector[bit] > 0)
+
+def page_fingerprint(body: bytes, encoding: Optional[str] = None, patterns: Sequence[str] = ()) -> Dict[str, str]:
+    """Simhash del texto visible y hash exacto de los valores extraíbles, en hex para poder inspeccionarlos"""
+    # El simhash solo tolera cambios de boilerplate; los valores que acaban en los registros
+    # (todas las cifras, el texto que casan los selectores y las ofertas embebidas) deben ser idénticos
+    content = _text_of(_TAG.sub(b' ', _SCRIPTS.sub(b' ', body)), encoding)
+    values = _NUMBER.findall(content)
+    for pattern in patterns:
+        values.extend(match.group() for match in re.finditer(pattern, content, re.I))
+    values.extend(f"{offer['name']}={offer['price']}/{offer['unit']}" for offer in find_offers(body, encoding))
+    return {
+        'simhash': f"{simhash(visible_text(body, encoding)):016x}",
+        'prices': hashlib.sha256('\n'.join(values).encode('utf-8')).hexdigest()[:16]
+    }
+
+def hamming(a: str, b: str) -> int:
+    """Bits distintos entre dos simhash en hex"""
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+class ParseResultCache:
+    """Último resultado de extracción de cada proveedor, en disco"""
+
+    def __init__(self, cache_dir: str, scraper_version: str):
+        self.cache_dir = cache_dir
+        self.scraper_version = scraper_version
+        self.stats = {
+            'hits': 0,
+            'near_duplicates': 0,
+            'misses': 0
+        }
+        # Huella de cada página en esta ejecución y distancia a la guardada
+        self.fingerprints: Dict[str, Dict] = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, provider: str) -> str:
+        return os.path.join(self.cache_dir, f"{provider}.json")
+
+    def load(self, provider: str) -> Optional[Dict]:
+        """Entrada guardada de un proveedor (hash, versiones y registros)"""
+        path = self._path(provider)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable parse cache for {provider}: {e}")
+            return None
+
+    def get(self, provider: str, body_hash: str, plan_version: str) -> Optional[List[Dict]]:
+        """Registros guardados si coinciden hash, versión del plan y del scraper"""
+        entry = self.load(provider)
+        if (
+            entry
+            and entry['content_hash'] == body_hash
+            and entry['plan_version'] == plan_version
+            and entry['scraper_version'] == self.scraper_version
+        ):
+            self.stats['hits'] += 1
+            logger.info(f"🧾 Page unchanged for {provider}, reusing {len(entry['records'])} records")
+            return entry['records']
+        return None
+
+    def get_similar(self, provider: str, fingerprint: Dict[str, str], plan_version: str,
+                    max_distance: int) -> Optional[List[Dict]]:
+        """Registros guardados si la página es casi idéntica (mismos valores, simhash cercano)"""
+        entry = self.load(provider)
+        distance = None
+        if entry and entry.get('fingerprint'):
+            distance = hamming(entry['fingerprint']['simhash'], fingerprint['simhash'])
+        self.fingerprints[provider] = dict(fingerprint, distance=distance)
+        if (
+            distance is not None
+            and distance <= max_distance
+            and entry['fingerprint']['prices'] == fingerprint['prices']
+            and entry['plan_version'] == plan_version
+            and entry['scraper_version'] == self.scraper_version
+        ):
+            self.stats['near_duplicates'] += 1
+            logger.info(f"🧾 Page near-identical for {provider} ({distance} bits), reusing {len(entry['records'])} records")
+            return entry['records']
+        return None
+
+    def put(self, provider: str, body_hash: str, plan_version: str, records: List[Dict],
+            fingerprint: Optional[Dict[str, str]] = None) -> None:
+        """Guarda el resultado de extracción de un proveedor"""
+        self.stats['misses'] += 1
+        entry = {
+            'content_hash': body_hash,
+            'plan_version': plan_version,
+            'scraper_version': self.scraper_version,
+            'fingerprint': fingerprint,
+            'stored_at': time.time(),
+            'records': records
+        }
+        path = self._path(provider)
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write parse cache for {provider}: {e}")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+🧮 Pool de procesos para parseo y extracción
+Saca el trabajo de CPU (BeautifulSoup + planes de extracción) del event loop.
+Cada slot es un ProcessPoolExecutor de un solo worker, de modo que un parseo
+colgado o que tumba su proceso se mata y se sustituye sin afectar a los demás
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ParseTimeoutError(Exception):
+    """El parseo de una página superó parse_timeout_seconds"""
+
+class ParsePool:
+    """Slots de un worker cada uno, repartidos entre las corrutinas que parsean"""
+
+    def __init__(self, workers: int, timeout: float):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots: List[ProcessPoolExecutor] = [ProcessPoolExecutor(max_workers=1) for _ in range(workers)]
+        self._free: Optional[asyncio.Queue] = None
+        self.stats = {
+            'tasks': 0,
+            'timeouts': 0,
+            'crashes': 0
+        }
+
+    def _free_slots(self) -> asyncio.Queue:
+        # La cola se crea perezosamente para quedar ligada al event loop activo
+        if self._free is None:
+            self._free = asyncio.Queue()
+            for slot in self._slots:
+                self._free.put_nowait(slot)
+        return self._free
+
+    async def run(self, fn: Callable, *args):
+        """Ejecuta fn(*args) en un slot libre con timeout; mata el worker si no responde"""
+        free = self._free_slots()
+        slot = await free.get()
+        self.stats['tasks'] += 1
+        try:
+            future = asyncio.get_running_loop().run_in_executor(slot, fn, *args)
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            slot = self._replace(slot)
+            raise ParseTimeoutError(f"parse exceeded {self.timeout}s, worker killed")
+        except BrokenProcessPool:
+            self.stats['crashes'] += 1
+            slot = self._replace(slot)
+            raise
+        except asyncio.CancelledError:
+            # Cancelado desde fuera (deadline del proveedor): el worker puede seguir ocupado
+            slot = self._replace(slot)
+            raise
+        finally:
+            free.put_nowait(slot)
+
+    def _replace(self, slot: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """Mata el proceso de un slot y lo sustituye por uno nuevo"""
+        self._kill(slot)
+        fresh = ProcessPoolExecutor(max_workers=1)
+        self._slots[self._slots.index(slot)] = fresh
+        logger.warning("🧮 Parse worker killed and replaced")
+        return fresh
+
+    @staticmethod
+    def _kill(slot: ProcessPoolExecutor):
+        # ProcessPoolExecutor no puede cancelar una tarea en curso: se mata el proceso
+        for process in list(getattr(slot, '_processes', {}).values()):
+            process.kill()
+        slot.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        """Cierra todos los workers"""
+        for slot in self._slots:
+            slot.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+⚡ Comparativa de backends de parseo HTML
+Ejecuta los scrapers sobre respuestas grabadas con cada backend de
+BeautifulSoup, mide el throughput de la etapa de parseo y comprueba que
+la extracción produce exactamente los mismos registros
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import logging
+import sys
+from typing import Dict, List
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+from main_scraper import ScrapingConfig
+from bilforsikring_scraper import BilforsikringScraper
+from leasing_scraper import LeasingScraper
+from replay_scraper import ReplayScraper, open_replay_source
+
+BACKENDS = ['html.parser', 'lxml']
+
+def available_backends() -> List[str]:
+    """Backends instalados en este entorno"""
+    backends = []
+    for backend in BACKENDS:
+        try:
+            BeautifulSoup('', backend)
+            backends.append(backend)
+        except FeatureNotFound:
+            print(f"⚠️ {backend} not installed, skipping")
+    return backends
+
+async def run_backend(source, backend: str, rounds: int) -> Dict:
+    """Parsea todas las páginas `rounds` veces con un backend"""
+    config = ScrapingConfig(html_parser=backend)
+    parse_seconds = 0.0
+    pages = 0
+    size = 0
+    records = []
+    for _ in range(rounds):
+        async with ReplayScraper(config, source) as scraper:
+            bilforsikring = await BilforsikringScraper(scraper).scrape_all_providers()
+            leasing = await LeasingScraper(scraper).scrape_all_providers()
+            parse_seconds += scraper.stage_timings.get('parse', 0.0)
+            pages += len(scraper.request_log)
+            size += sum(entry['bytes'] for entry in scraper.request_log)
+            records = [dataclasses.asdict(item) for item in bilforsikring + leasing]
+    return {
+        'backend': backend,
+        'pages': pages,
+        'bytes': size,
+        'parse_seconds': parse_seconds,
+        'records': records
+    }
+
+async def main_async(args) -> int:
+    source = open_replay_source(args.source)
+    results = [await run_backend(source, backend, args.rounds) for backend in available_backends()]
+    if not results or not results[0]['pages']:
+        print("❌ No pages to parse")
+        return 1
+
+    baseline = results[0]
+    print(f"\n{'backend':<12} {'pages/s':>10} {'MiB/s':>8} {'speedup':>8}  output")
+    for result in results:
+        seconds = result['parse_seconds'] or 1e-9
+        same = 'identical' if result['records'] == baseline['records'] else 'DIFFERENT'
+        print(
+            f"{result['backend']:<12} "
+            f"{result['pages'] / seconds:>10.1f} "
+            f"{result['bytes'] / seconds / 1024 / 1024:>8.2f} "
+            f"{baseline['parse_seconds'] / seconds:>7.2f}x  {same}"
+        )
+    return 0 if all(result['records'] == baseline['records'] for result in results) else 2
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description='Compare BeautifulSoup parser backends on recorded pages')
+    parser.add_argument('source', help='Recorded .warc.gz archive or fixture directory')
+    parser.add_argument('--rounds', type=int, default=20, help='Times each page is parsed per backend')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    sys.exit(asyncio.run(main_async(args)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+🧱 Utilidades para los registros de datos
+Registros con __slots__ (sin __dict__ por instancia) y números en formato
+danés: se parsean una sola vez al extraer y se formatean solo al mostrar
+"""
+
+import re
+from dataclasses import fields, is_dataclass
+from typing import Optional, Union
+
+# Número en formato danés: miles con '.' o espacio (normal o duro) y decimales con ','
+# ('Fra 3 995 kr' -> 3995; el grupo de miles no puede cortar un número: 'Model 3 2024' -> 3)
+_THOUSANDS = r'\d{1,3}(?:[ .\u00a0\u202f]\d{3})+(?!\d)'
+DANISH_NUMBER = _THOUSANDS + r'(?:,\d+)?|\d+(?:[.,]\d+)?'
+_DANISH_NUMBER = re.compile(DANISH_NUMBER)
+
+def add_slots(cls):
+    """Recrea una dataclass con __slots__ (dataclass(slots=True) requiere Python 3.10)"""
+    if not is_dataclass(cls):
+        raise TypeError(f"{cls.__name__} is not a dataclass")
+    field_names = tuple(field.name for field in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    cls_dict['__slots__'] = field_names
+    # Los defaults viven en __init__; como atributos de clase chocarían con los slots
+    for name in field_names + ('__dict__', '__weakref__'):
+        cls_dict.pop(name, None)
+    slotted = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    slotted.__qualname__ = cls.__qualname__
+    return slotted
+
+def parse_danish_number(text) -> Optional[Union[int, float]]:
+    """Primer número de un texto: '3.995 kr./md' -> 3995, '399,50 kr' -> 399.5 (4295.0 -> 4295)"""
+    if text is None or isinstance(text, bool):
+        return None
+    if isinstance(text, (int, float)):
+        return int(text) if float(text).is_integer() else text
+    match = _DANISH_NUMBER.search(str(text))
+    if not match:
+        return None
+    raw = match.group()
+    if ',' in raw:
+        # ',' es siempre el separador decimal; '.' y los espacios solo pueden ser de miles
+        raw = re.sub(r'[ .\u00a0\u202f]', '', raw).replace(',', '.')
+    elif re.fullmatch(_THOUSANDS, raw):
+        # '3.995', '3 995' y '15.000' son miles; '2.5' (grupo de 1 cifra) es decimal
+        raw = re.sub(r'[ .\u00a0\u202f]', '', raw)
+    value = float(raw)
+    return int(value) if value.is_integer() else value
+
+def format_kr(value: float) -> str:
+    """3995 -> '3.995', 399.5 -> '399,50' (formato danés)"""
+    if float(value).is_integer():
+        return f"{int(value):,}".replace(',', '.')
+    return f"{value:,.2f}".replace(',', '#').replace('.', ',').replace('#', '.')
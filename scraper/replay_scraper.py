@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+⏪ Modo replay: ejecuta los scrapers sobre respuestas grabadas
+Sustituye la red por un archivo WARC o un directorio de fixtures, sin
+rate limiting, jitter ni reintentos, para medir parseo/extracción/serialización
+"""
+
+import dataclasses
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Optional, Union
+from urllib.parse import urlparse
+
+from main_scraper import EthicalScraper, FetchResult, ScrapingConfig
+from response_archive import ArchivedResponse, ResponseArchive
+
+logger = logging.getLogger(__name__)
+
+class FixtureDirectory:
+    """Páginas guardadas a mano en <dir>/<host>/<ruta>.html"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _file_for(self, url: str) -> str:
+        parsed = urlparse(url)
+        route = parsed.path.strip('/')
+        if not route:
+            route = 'index.html'
+        elif not os.path.splitext(route)[1]:
+            route = f"{route}.html"
+        return os.path.join(self.path, parsed.netloc, route)
+
+    def get(self, url: str) -> Optional[ArchivedResponse]:
+        """Devuelve la fixture de una URL como si fuera una respuesta grabada"""
+        file_path = self._file_for(url)
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, 'rb') as f:
+            body = f.read()
+        # La fecha de la fixture es su mtime: estable mientras no cambie el fichero
+        mtime = datetime.fromtimestamp(os.path.getmtime(file_path), timezone.utc)
+        return ArchivedResponse(
+            url=url,
+            status=200,
+            headers={},
+            body=body,
+            fetched_at=mtime.strftime('%Y-%m-%dT%H:%M:%SZ')
+        )
+
+def open_replay_source(path: str) -> Union[ResponseArchive, FixtureDirectory]:
+    """Abre un archivo .warc.gz o un directorio de fixtures"""
+    if os.path.isdir(path):
+        return FixtureDirectory(path)
+    return ResponseArchive(path)
+
+class ReplayScraper(EthicalScraper):
+    """EthicalScraper que lee de respuestas grabadas en lugar de la red"""
+
+    def __init__(self, config: ScrapingConfig, source: Union[ResponseArchive, FixtureDirectory]):
+        # Nada de cache en disco, robots.txt, estado adaptativo ni grabación en replay;
+        # tampoco cache de extracción: el replay existe para medir el parseo
+        config = dataclasses.replace(
+            config,
+            use_disk_cache=False,
+            use_parse_cache=False,
+            respect_robots_txt=False,
+            adaptive_rate_limit=False,
+            record_archive=None
+        )
+        super().__init__(config)
+        self.source = source
+        self.replayed_at: Optional[str] = None
+
+    async def __aenter__(self):
+        """Sin sesión HTTP: todas las respuestas salen del archivo"""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """No hay sesión que cerrar ni estado que persistir; solo el pool de parseo"""
+        if self.parse_pool:
+            self.parse_pool.close()
+
+    async def prefetch_robots(self, urls):
+        """robots.txt no aplica en replay"""
+
+    async def _fetch_bytes(self, url: str, retries: int = None) -> Optional[FetchResult]:
+        """Sirve la respuesta grabada de la URL, sin esperas ni reintentos"""
+        response = self.source.get(url)
+        if response is None or response.status != 200:
+            logger.warning(f"⏪ No recorded 200 response for {url}")
+            return None
+
+        self.replayed_at = max(self.replayed_at or '', response.fetched_at)
+        return FetchResult(
+            url,
+            response.body,
+            response.encoding,
+            stats=self._log_request(url, 'replay', 200, len(response.body), 0.0),
+            fetched_at=response.fetched_at
+        )
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+🗄️ Archivo de respuestas estilo WARC
+Graba cada respuesta descargada (URL, status, cabeceras, cuerpo y tiempos)
+en un fichero comprimido append-only con índice de offsets, para poder
+re-ejecutar el parseo sin volver a tocar la red
+"""
+
+import gzip
+import json
+import logging
+import os
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from multidict import CIMultiDict
+
+logger = logging.getLogger(__name__)
+
+# Cabeceras que dejan de ser ciertas porque guardamos el cuerpo ya descomprimido
+_DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+
+@dataclass
+class ArchivedResponse:
+    """Respuesta leída del archivo"""
+    url: str
+    status: int
+    headers: CIMultiDict
+    body: bytes
+    fetched_at: str
+    elapsed: float = 0.0
+
+    def __post_init__(self):
+        # Los nombres de cabecera no distinguen mayúsculas ('content-type' en HTTP/2)
+        self.headers = CIMultiDict(self.headers)
+
+    @property
+    def encoding(self) -> Optional[str]:
+        """Charset declarado en Content-Type, si lo hay"""
+        content_type = self.headers.get('Content-Type', '')
+        for param in content_type.split(';')[1:]:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'charset' and value.strip():
+                return value.strip().strip('"')
+        return None
+
+class ResponseRecorder:
+    """Graba respuestas como registros WARC/1.1, un miembro gzip por registro"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.records = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'ab')
+        self._index = open(self.index_path, 'a', encoding='utf-8')
+
+    def record(self, url: str, status: int, reason: str, headers, body: bytes, elapsed: float) -> None:
+        """Añade una respuesta al archivo y su entrada al índice"""
+        fetched_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        http_lines = [f"HTTP/1.1 {status} {reason or ''}".rstrip()]
+        for name, value in headers.items():
+            if name.lower() not in _DROPPED_HEADERS:
+                http_lines.append(f"{name}: {value}")
+        http_lines.append(f"Content-Length: {len(body)}")
+        http_block = ('\r\n'.join(http_lines) + '\r\n\r\n').encode('utf-8') + body
+
+        warc_headers = [
+            'WARC/1.1',
+            'WARC-Type: response',
+            f'WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>',
+            f'WARC-Date: {fetched_at}',
+            f'WARC-Target-URI: {url}',
+            f'WARC-Fetch-Elapsed: {elapsed:.4f}',
+            'Content-Type: application/http;msgtype=response',
+            f'Content-Length: {len(http_block)}',
+        ]
+        record = ('\r\n'.join(warc_headers) + '\r\n\r\n').encode('utf-8') + http_block + b'\r\n\r\n'
+
+        member = gzip.compress(record)
+        offset = self._file.tell()
+        self._file.write(member)
+        self._file.flush()
+
+        self._index.write(json.dumps({
+            'url': url,
+            'status': status,
+            'offset': offset,
+            'length': len(member),
+            'date': fetched_at,
+            'elapsed': round(elapsed, 4)
+        }, ensure_ascii=False) + '\n')
+        self._index.flush()
+        self.records += 1
+
+    def close(self) -> None:
+        """Cierra el archivo y el índice"""
+        self._file.close()
+        self._index.close()
+        logger.info(f"🗄️ Recorded {self.records} responses to {self.path}")
+
+class ResponseArchive:
+    """Lector de un archivo grabado, con acceso directo por URL vía índice"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index: List[Dict] = self._load_index()
+        # La última grabación de cada URL es la que cuenta
+        self.by_url: Dict[str, Dict] = {entry['url']: entry for entry in self.index}
+
+    def _load_index(self) -> List[Dict]:
+        index_path = f"{self.path}.idx"
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        logger.warning(f"No index for {self.path}, scanning archive")
+        return self._scan()
+
+    def _scan(self) -> List[Dict]:
+        """Reconstruye el índice recorriendo los miembros gzip del archivo"""
+        entries = []
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        offset = 0
+        while offset < len(data):
+            decompressor = zlib.decompressobj(wbits=31)
+            record = decompressor.decompress(data[offset:])
+            length = len(data) - offset - len(decompressor.unused_data)
+            response = self._parse_record(record)
+            entries.append({
+                'url': response.url,
+                'status': response.status,
+                'offset': offset,
+                'length': length,
+                'date': response.fetched_at,
+                'elapsed': response.elapsed
+            })
+            offset += length
+        return entries
+
+    def urls(self) -> List[str]:
+        """URLs disponibles en el archivo"""
+        return list(self.by_url)
+
+    def get(self, url: str) -> Optional[ArchivedResponse]:
+        """Devuelve la última respuesta grabada para una URL"""
+        entry = self.by_url.get(url)
+        return self._read(entry) if entry else None
+
+    def __iter__(self) -> Iterator[ArchivedResponse]:
+        for entry in self.index:
+            yield self._read(entry)
+
+    def _read(self, entry: Dict) -> ArchivedResponse:
+        with open(self.path, 'rb') as f:
+            f.seek(entry['offset'])
+            member = f.read(entry['length'])
+        return self._parse_record(gzip.decompress(member))
+
+    @staticmethod
+    def _parse_headers(block: bytes) -> CIMultiDict:
+        headers = CIMultiDict()
+        for line in block.decode('utf-8', errors='replace').split('\r\n'):
+            name, sep, value = line.partition(':')
+            if sep:
+                headers.add(name.strip(), value.strip())
+        return headers
+
+    @classmethod
+    def _parse_record(cls, record: bytes) -> ArchivedResponse:
+        """Separa cabeceras WARC, línea de estado/cabeceras HTTP y cuerpo"""
+        warc_head, _, rest = record.partition(b'\r\n\r\n')
+        warc_headers = cls._parse_headers(warc_head.split(b'\r\n', 1)[1])
+        http_block = rest[:int(warc_headers['Content-Length'])]
+
+        http_head, _, body = http_block.partition(b'\r\n\r\n')
+        status_line, _, header_lines = http_head.partition(b'\r\n')
+        status = int(status_line.split()[1])
+
+        return ArchivedResponse(
+            url=warc_headers['WARC-Target-URI'],
+            status=status,
+            headers=cls._parse_headers(header_lines),
+            body=body,
+            fetched_at=warc_headers.get('WARC-Date', ''),
+            elapsed=float(warc_headers.get('WARC-Fetch-Elapsed', 0.0))
+        )
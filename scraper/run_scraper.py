@@ -6,11 +6,12 @@ Punto de entrada para el sistema de scraping ético
 
 import asyncio
 import argparse
+import dataclasses
 import logging
 import sys
 import os
 from datetime import datetime
-from typing import List
+from typing import Dict, List
 
 # Añadir el directorio actual al path para imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -18,6 +19,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from main_scraper import EthicalScraper, ScrapingConfig, DataManager
 from bilforsikring_scraper import BilforsikringScraper
 from leasing_scraper import LeasingScraper
+from replay_scraper import ReplayScraper, open_replay_source
 
 # Configuración de logging
 logging.basicConfig(
@@ -33,13 +35,21 @@ logger = logging.getLogger(__name__)
 class ScrapingOrchestrator:
     """Orquestador principal del sistema de scraping"""
     
-    def __init__(self):
-        self.config = ScrapingConfig()
-        self.data_manager = DataManager()
-        self.results = {
+    def __init__(self, config: ScrapingConfig = None, replay_path: str = None):
+        self.config = config or ScrapingConfig()
+        self.replay_path = replay_path
+        # En replay no se tocan los datos de producción
+        self.data_manager = DataManager("data/replay" if replay_path else "data")
+        self.scrape_type = 'all'
+        self.results = self._empty_results()
+    
+    @staticmethod
+    def _empty_results() -> Dict:
+        return {
             'bilforsikring': [],
             'leasing': [],
             'errors': [],
+            'providers': {},
             'stats': {
                 'start_time': None,
                 'end_time': None,
@@ -51,11 +61,72 @@ class ScrapingOrchestrator:
     
     async def run_scraping(self, scrape_type: str = 'all'):
         """Ejecuta el scraping según el tipo especificado"""
+        try:
+            async with self._create_scraper() as scraper:
+                await self._run_job(scraper, scrape_type)
+        except Exception as e:
+            logger.error(f"❌ Critical error in scraping process: {e}")
+    
+    async def run_daemon(self, scrape_type: str = 'all'):
+        """Proceso de larga vida: una sola sesión y cada tipo de scraping en su intervalo"""
+        # Import perezoso: las ejecuciones puntuales no pagan el coste de APScheduler
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        
+        intervals = {
+            'bilforsikring': self.config.daemon_bilforsikring_interval_minutes,
+            'leasing': self.config.daemon_leasing_interval_minutes
+        }
+        if scrape_type in intervals:
+            intervals = {scrape_type: intervals[scrape_type]}
+        
+        # Un refresco servido entero desde la cache en disco no refrescaría nada: cada job
+        # revalida sus páginas con un GET condicional (un 304 reutiliza la copia en disco)
+        self.config = dataclasses.replace(self.config, revalidate_disk_cache=True)
+        
+        async with self._create_scraper() as scraper:
+            # Los jobs no se solapan: comparten scraper, resultados y cortesía con los hosts
+            job_lock = asyncio.Lock()
+            
+            async def run_job(job_type: str):
+                async with job_lock:
+                    await self._run_job(scraper, job_type)
+                    scraper.rate_limiter.save_state()
+            
+            scheduler = AsyncIOScheduler()
+            for job_type, minutes in intervals.items():
+                scheduler.add_job(
+                    run_job,
+                    'interval',
+                    minutes=minutes,
+                    args=[job_type],
+                    id=job_type,
+                    next_run_time=datetime.now(),
+                    max_instances=1,
+                    coalesce=True,
+                    misfire_grace_time=None
+                )
+                logger.info(f"⏰ Scheduled {job_type} every {minutes:g} minutes")
+            
+            scheduler.start()
+            try:
+                await asyncio.Event().wait()
+            finally:
+                scheduler.shutdown(wait=False)
+                logger.info("🛑 Daemon stopped")
+    
+    async def _run_job(self, scraper: EthicalScraper, scrape_type: str):
+        """Un job de scraping sobre un scraper ya abierto"""
         logger.info(f"🚀 Starting scraping process: {scrape_type}")
+        self.scrape_type = scrape_type
+        self.results = self._empty_results()
+        scraper.start_run()
+        self.data_manager.start_run()
         self.results['stats']['start_time'] = datetime.now()
+        # Límite global: los proveedores que no quepan se marcan como parciales
+        self.deadline = asyncio.get_running_loop().time() + self.config.run_deadline_seconds
         
         try:
-            async with EthicalScraper(self.config) as scraper:
+            try:
                 if scrape_type in ['all', 'bilforsikring']:
                     await self._scrape_bilforsikring(scraper)
                 
@@ -64,6 +135,9 @@ class ScrapingOrchestrator:
                 
                 if scrape_type == 'test':
                     await self._run_tests(scraper)
+            finally:
+                self.results['stats'].update(scraper.get_stats())
+                self.results['stats']['serialization'] = self.data_manager.get_serialization_stats()
                 
         except Exception as e:
             logger.error(f"❌ Critical error in scraping process: {e}")
@@ -74,35 +148,32 @@ class ScrapingOrchestrator:
             await self._save_results()
             self._print_summary()
     
+    def _create_scraper(self) -> EthicalScraper:
+        """Scraper de red, o de respuestas grabadas en modo replay"""
+        if self.replay_path:
+            logger.info(f"⏪ Replaying responses from {self.replay_path}")
+            return ReplayScraper(self.config, open_replay_source(self.replay_path))
+        return EthicalScraper(self.config)
+    
     async def _scrape_bilforsikring(self, scraper):
         """Scraping de seguros de auto"""
         logger.info("🏢 Starting bilforsikring scraping...")
         
         try:
             bilforsikring_scraper = BilforsikringScraper(scraper)
-            data = await bilforsikring_scraper.scrape_all_providers()
+            data = await bilforsikring_scraper.scrape_all_providers(self.deadline)
+            self.results['providers'].update(bilforsikring_scraper.provider_status)
             
             if data:
-                # Convertir a formato JSON
-                json_data = []
-                for item in data:
-                    json_data.append({
-                        'udbyder': item.udbyder,
-                        'produkt': item.produkt,
-                        'pris_mdr': item.pris_mdr,
-                        'pris_år': item.pris_år,
-                        'dækning': item.dækning,
-                        'tilvalg': item.tilvalg,
-                        'kampagne': item.kampagne,
-                        'link': item.link,
-                        'last_updated': item.last_updated,
-                        'data_source': item.data_source,
-                        'reliability_score': item.reliability_score,
-                        'additional_info': item.additional_info
-                    })
-                
-                self.results['bilforsikring'] = json_data
-                self.data_manager.save_data('bilforsikring.json', json_data)
+                with scraper.timed('serialize'):
+                    # Esquema del registro -> dicts -> JSON legible + minificado
+                    json_data = self.data_manager.save_records(
+                        'bilforsikring.json', data, getattr(scraper, 'replayed_at', None)
+                    )
+                    self.results['bilforsikring'] = json_data
+                if self.config.columnar_export:
+                    with scraper.timed('columnar'):
+                        self.data_manager.save_columnar('bilforsikring', data, getattr(scraper, 'replayed_at', None))
                 logger.info(f"✅ Bilforsikring scraping completed: {len(json_data)} products")
             else:
                 logger.warning("⚠️ No bilforsikring data found")
@@ -117,30 +188,19 @@ class ScrapingOrchestrator:
         
         try:
             leasing_scraper = LeasingScraper(scraper)
-            data = await leasing_scraper.scrape_all_providers()
+            data = await leasing_scraper.scrape_all_providers(self.deadline)
+            self.results['providers'].update(leasing_scraper.provider_status)
             
             if data:
-                # Convertir a formato JSON
-                json_data = []
-                for item in data:
-                    json_data.append({
-                        'mærke': item.mærke,
-                        'model': item.model,
-                        'variant': item.variant,
-                        'pris_mdr': item.pris_mdr,
-                        'udbetaling': item.udbetaling,
-                        'løbetid': item.løbetid,
-                        'km_år': item.km_år,
-                        'kampagne': item.kampagne,
-                        'link': item.link,
-                        'last_updated': item.last_updated,
-                        'data_source': item.data_source,
-                        'reliability_score': item.reliability_score,
-                        'additional_info': item.additional_info
-                    })
-                
-                self.results['leasing'] = json_data
-                self.data_manager.save_data('leasing.json', json_data)
+                with scraper.timed('serialize'):
+                    # Esquema del registro -> dicts -> JSON legible + minificado
+                    json_data = self.data_manager.save_records(
+                        'leasing.json', data, getattr(scraper, 'replayed_at', None)
+                    )
+                    self.results['leasing'] = json_data
+                if self.config.columnar_export:
+                    with scraper.timed('columnar'):
+                        self.data_manager.save_columnar('leasing', data, getattr(scraper, 'replayed_at', None))
                 logger.info(f"✅ Leasing scraping completed: {len(json_data)} vehicles")
             else:
                 logger.warning("⚠️ No leasing data found")
@@ -166,11 +226,18 @@ class ScrapingOrchestrator:
     async def _save_results(self):
         """Guarda los resultados del scraping"""
         try:
-            # Guardar métricas
+            # Guardar métricas (las fechas de stats se guardan en ISO, no como datetime)
+            stats = self.results['stats']
+            results = dict(self.results)
+            results['stats'] = dict(
+                stats,
+                start_time=stats['start_time'].isoformat() if stats['start_time'] else None,
+                end_time=stats['end_time'].isoformat() if stats['end_time'] else None
+            )
             metrics = {
                 'timestamp': datetime.now().isoformat(),
-                'scrape_type': 'all',
-                'results': self.results,
+                'scrape_type': self.scrape_type,
+                'results': results,
                 'summary': {
                     'total_bilforsikring': len(self.results['bilforsikring']),
                     'total_leasing': len(self.results['leasing']),
@@ -200,6 +267,74 @@ class ScrapingOrchestrator:
         print(f"🚗 Leasing: {len(self.results['leasing'])} vehicles")
         print(f"❌ Errors: {len(self.results['errors'])}")
         
+        partial = [name for name, info in self.results['providers'].items() if info['status'] == 'partial']
+        if partial:
+            print(f"⏰ Partial (deadline exceeded): {', '.join(partial)}")
+        
+        if 'requests' in stats:
+            print(
+                f"📥 Requests: {len(stats['requests'])} "
+                f"({stats['bytes_downloaded'] / 1024:.1f} KiB downloaded, "
+                f"{stats['decode_seconds']:.3f}s decoding, "
+                f"{stats['coalesced']} coalesced)"
+            )
+        
+        if stats.get('rate_limits'):
+            rates = ', '.join(f"{host}={rate:.2f}/s" for host, rate in stats['rate_limits'].items())
+            print(f"🚦 Rate limits: {rates}")
+        
+        if stats.get('stage_seconds'):
+            stages = ', '.join(f"{stage}={seconds:.3f}s" for stage, seconds in stats['stage_seconds'].items())
+            print(f"⏱️  Stages: {stages}")
+        
+        breaker_stats = stats.get('circuit_breaker')
+        if breaker_stats and breaker_stats['open_hosts']:
+            print(
+                f"🔌 Circuit open: {', '.join(breaker_stats['open_hosts'])} "
+                f"({breaker_stats['short_circuited']} requests skipped)"
+            )
+        
+        pool_stats = stats.get('parse_pool')
+        if pool_stats:
+            print(
+                f"🧮 Parse pool: {pool_stats['tasks']} pages, "
+                f"{pool_stats['timeouts']} timeouts, {pool_stats['crashes']} crashes"
+            )
+        
+        memory_stats = stats.get('memory_cache')
+        if memory_stats:
+            print(
+                f"🧠 Memory cache: {memory_stats['entries']} pages, "
+                f"{memory_stats['bytes'] / 1024:.1f} KiB, "
+                f"hit ratio {memory_stats['hit_ratio']:.0%}, "
+                f"{memory_stats['evictions']} evictions"
+            )
+        
+        cache_stats = stats.get('http_cache')
+        if cache_stats:
+            print(
+                f"💾 HTTP cache: {cache_stats['hits']} hits, "
+                f"{cache_stats['misses']} misses, "
+                f"{cache_stats['revalidated']} revalidated (304)"
+            )
+        
+        parse_cache_stats = stats.get('parse_cache')
+        if parse_cache_stats:
+            print(
+                f"🧾 Parse cache: {parse_cache_stats['hits']} unchanged pages reused, "
+                f"{parse_cache_stats['near_duplicates']} near-duplicates reused, "
+                f"{parse_cache_stats['misses']} parsed"
+            )
+        
+        serialization_stats = stats.get('serialization')
+        if serialization_stats and serialization_stats['records']:
+            print(
+                f"🧾 Serialization ({serialization_stats['backend']}): "
+                f"{serialization_stats['records']} records, "
+                f"{serialization_stats['bytes'] / 1024:.1f} KiB written, "
+                f"{serialization_stats['records_per_second']:,} records/s"
+            )
+        
         if self.results['errors']:
             print("\n🚨 ERRORS:")
             for error in self.results['errors']:
@@ -216,6 +351,58 @@ def main():
         default='all',
         help='Type of scraping to perform'
     )
+    parser.add_argument(
+        '--adaptive-rate',
+        action='store_true',
+        help='Adapt the per-host request rate (AIMD) and persist it between runs'
+    )
+    parser.add_argument(
+        '--record',
+        metavar='ARCHIVE',
+        help='Record every response to a compressed WARC archive (e.g. data/archive/run.warc.gz)'
+    )
+    parser.add_argument(
+        '--replay',
+        metavar='ARCHIVE_OR_DIR',
+        help='Run offline over a recorded .warc.gz archive or a fixture directory (<host>/<path>.html)'
+    )
+    parser.add_argument(
+        '--deadline',
+        type=float,
+        default=ScrapingConfig.run_deadline_seconds,
+        help='Overall time budget for the run in seconds'
+    )
+    parser.add_argument(
+        '--parser',
+        choices=['lxml', 'html.parser'],
+        default=ScrapingConfig.html_parser,
+        help='BeautifulSoup parser backend (falls back to html.parser if lxml is missing)'
+    )
+    parser.add_argument(
+        '--parse-workers',
+        type=int,
+        default=ScrapingConfig.parse_workers,
+        help='Worker processes for parsing and extraction (0 = parse on the event loop)'
+    )
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Keep running with a warm session and refresh each scraping type on its own interval'
+    )
+    parser.add_argument(
+        '--bilforsikring-interval',
+        type=float,
+        default=ScrapingConfig.daemon_bilforsikring_interval_minutes,
+        metavar='MINUTES',
+        help='Daemon refresh interval for bilforsikring'
+    )
+    parser.add_argument(
+        '--leasing-interval',
+        type=float,
+        default=ScrapingConfig.daemon_leasing_interval_minutes,
+        metavar='MINUTES',
+        help='Daemon refresh interval for leasing'
+    )
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -228,10 +415,22 @@ def main():
         logging.getLogger().setLevel(logging.DEBUG)
     
     # Crear y ejecutar orquestador
-    orchestrator = ScrapingOrchestrator()
+    config = ScrapingConfig(
+        adaptive_rate_limit=args.adaptive_rate,
+        record_archive=args.record,
+        run_deadline_seconds=args.deadline,
+        html_parser=args.parser,
+        parse_workers=args.parse_workers,
+        daemon_bilforsikring_interval_minutes=args.bilforsikring_interval,
+        daemon_leasing_interval_minutes=args.leasing_interval
+    )
+    orchestrator = ScrapingOrchestrator(config, replay_path=args.replay)
     
     try:
-        asyncio.run(orchestrator.run_scraping(args.type))
+        if args.daemon:
+            asyncio.run(orchestrator.run_daemon(args.type))
+        else:
+            asyncio.run(orchestrator.run_scraping(args.type))
     except KeyboardInterrupt:
         logger.info("🛑 Scraping interrupted by user")
     except Exception as e:
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+🧾 Serialización de registros
+Convierte registros a dicts según su esquema (campos de la dataclass o
+EXPORT_FIELDS) y los codifica con orjson si está instalado, o con json.
+Uso como benchmark: python serialization.py --records 100000
+"""
+
+import argparse
+import json
+import time
+from dataclasses import fields
+from datetime import date, datetime
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Type
+
+try:
+    import orjson
+except ImportError:  # Opcional: sin orjson se usa json de la librería estándar
+    orjson = None
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+def _default(value):
+    """Tipos que json no sabe codificar (orjson los soporta de forma nativa)"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _json_dumps(obj: Any, pretty: bool = False) -> bytes:
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=_default).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+def _orjson_dumps(obj: Any, pretty: bool = False) -> bytes:
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+BACKENDS: Dict[str, Callable[..., bytes]] = {'json': _json_dumps}
+if orjson is not None:
+    BACKENDS['orjson'] = _orjson_dumps
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """JSON en UTF-8: indentado (archivo) o minificado (web)"""
+    return BACKENDS[JSON_BACKEND](obj, pretty)
+
+class RecordSerializer:
+    """Convierte registros de un tipo a dicts, con un getter compilado para su esquema"""
+
+    def __init__(self, record_type: Type):
+        self.record_type = record_type
+        # EXPORT_FIELDS añade las propiedades derivadas (textos de precios) y fija el orden
+        field_names = [f.name for f in fields(record_type)]
+        self.keys = tuple(getattr(record_type, 'EXPORT_FIELDS', None) or field_names)
+        missing = [key for key in self.keys if key not in field_names and not hasattr(record_type, key)]
+        if missing:
+            raise ValueError(f"{record_type.__name__} has no fields {missing}")
+        self._getter = attrgetter(*self.keys)
+
+    def to_dicts(self, records: List) -> List[Dict[str, Any]]:
+        """Un dict por registro, con las claves del esquema en orden"""
+        keys, getter = self.keys, self._getter
+        if len(keys) == 1:
+            return [{keys[0]: getter(record)} for record in records]
+        return [dict(zip(keys, getter(record))) for record in records]
+
+# Un serializador por tipo de registro, compilado la primera vez que se usa
+_SERIALIZERS: Dict[Type, RecordSerializer] = {}
+
+def serializer_for(record_type: Type) -> RecordSerializer:
+    """Serializador (cacheado) de un tipo de registro"""
+    serializer = _SERIALIZERS.get(record_type)
+    if serializer is None:
+        serializer = _SERIALIZERS[record_type] = RecordSerializer(record_type)
+    return serializer
+
+def serialize_records(records: List) -> List[Dict[str, Any]]:
+    """Registros (todos del mismo tipo) a dicts según su esquema"""
+    if not records:
+        return []
+    return serializer_for(type(records[0])).to_dicts(records)
+
+def main():
+    """Mide el throughput de cada backend con los registros de ejemplo replicados"""
+    from bilforsikring_scraper import BilforsikringScraper, InsuranceData
+    from leasing_scraper import LeasingData, LeasingScraper
+
+    parser = argparse.ArgumentParser(description="Measure record serialization throughput per JSON backend")
+    parser.add_argument('--records', type=int, default=100000, help='Records per dataset')
+    args = parser.parse_args()
+
+    samples = {
+        'bilforsikring': [
+            InsuranceData(udbyder=config['udbyder'], link=config['url'], data_source=config['data_source'], **fallback)
+            for config in BilforsikringScraper(None).targets.values() for fallback in config['fallback']
+        ],
+        'leasing': [
+            LeasingData(link=config['url'], data_source=config['data_source'], **fallback)
+            for config in LeasingScraper(None).targets.values() for fallback in config['fallback']
+        ]
+    }
+
+    print(f"{'dataset':<14}{'step':<10}{'backend':<9}{'records/s':>12}{'MiB/s':>9}{'size MiB':>10}")
+    for name, sample in samples.items():
+        records = (sample * (args.records // len(sample) + 1))[:args.records]
+        start = time.perf_counter()
+        data = serialize_records(records)
+        seconds = time.perf_counter() - start
+        print(f"{name:<14}{'to_dicts':<10}{'-':<9}{len(records) / seconds:>12,.0f}{'':>9}{'':>10}")
+        document = {'data': data}
+        for backend, encode in BACKENDS.items():
+            for pretty in (True, False):
+                start = time.perf_counter()
+                payload = encode(document, pretty)
+                seconds = time.perf_counter() - start
+                mib = len(payload) / 2 ** 20
+                step = 'pretty' if pretty else 'minified'
+                print(f"{name:<14}{step:<10}{backend:<9}{len(records) / seconds:>12,.0f}"
+                      f"{mib / seconds:>9.1f}{mib:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -51,7 +51,7 @@ def create_config_file():
             "max_retries": 3,
             "retry_delay": 5,
             "respect_robots_txt": True,
-            "cache_duration_hours": 24
+            "cache_duration_hours": 20
         },
         "targets": {
             "bilforsikring": [
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+📦 Datos estructurados embebidos: JSON-LD y estado de hidratación (__NEXT_DATA__)
+Se localizan con un escaneo de bytes, sin construir el árbol HTML, y se
+normalizan a ofertas planas que los scrapers convierten en registros
+"""
+
+import json
+import logging
+import re
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from records import parse_danish_number
+
+logger = logging.getLogger(__name__)
+
+_JSON_LD = re.compile(
+    rb'<script\b[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>', re.I | re.S
+)
+_NEXT_DATA = re.compile(
+    rb'<script\b[^>]*\bid\s*=\s*["\']?__NEXT_DATA__["\']?[^>]*>(.*?)</script\s*>', re.I | re.S
+)
+
+# Tipos schema.org que describen algo con precio
+PRODUCT_TYPES = {'product', 'car', 'vehicle', 'individualproduct', 'productmodel', 'financialproduct', 'service'}
+
+# Claves habituales en el estado de hidratación de las apps
+NAME_KEYS = ('name', 'title', 'modelName', 'displayName')
+MONTHLY_PRICE_KEYS = ('monthlyPrice', 'pricePerMonth', 'monthlyPayment', 'monthlyCost')
+PRICE_KEYS = MONTHLY_PRICE_KEYS + ('price',)
+DOWN_PAYMENT_KEYS = ('downPayment', 'down_payment', 'initialPayment', 'udbetaling')
+TERM_KEYS = ('termMonths', 'leaseTerm', 'durationMonths', 'duration', 'løbetid')
+KM_KEYS = ('kmPerYear', 'annualMileage', 'mileage')
+
+_MONTH_UNITS = ('mon', 'month', 'p1m', 'md', 'måned')
+_YEAR_UNITS = ('ann', 'year', 'p1y', 'år')
+
+def _number(value) -> Optional[float]:
+    """Número de un valor JSON: 3995, "3995.00", "1.299,00", "4.995 kr." o {"amount": 3995}"""
+    if isinstance(value, dict):
+        value = value.get('amount', value.get('value'))
+    number = parse_danish_number(value)
+    return float(number) if number is not None else None
+
+def _unit(value) -> Optional[str]:
+    """'month' o 'year' a partir de unitCode, unitText o billingDuration"""
+    text = str(value or '').strip().lower()
+    if text.startswith(_MONTH_UNITS):
+        return 'month'
+    if text.startswith(_YEAR_UNITS):
+        return 'year'
+    return None
+
+def _text(value) -> str:
+    if isinstance(value, dict):
+        value = value.get('name', '')
+    if isinstance(value, list):
+        value = value[0] if value else ''
+    return str(value or '').strip()
+
+def _types(node: Dict) -> List[str]:
+    types = node.get('@type', [])
+    return [t.lower() for t in (types if isinstance(types, list) else [types]) if isinstance(t, str)]
+
+def _walk(node) -> Iterator[Dict]:
+    """Todos los objetos JSON anidados (incluidos los de @graph)"""
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk(item)
+
+def _offer_price(offers) -> Tuple[Optional[float], Optional[str], Optional[str]]:
+    """(precio, moneda, unidad) de la primera oferta con precio"""
+    for offer in offers if isinstance(offers, list) else [offers]:
+        if not isinstance(offer, dict):
+            continue
+        specs = offer.get('priceSpecification') or []
+        for spec in specs if isinstance(specs, list) else [specs]:
+            if isinstance(spec, dict) and _number(spec.get('price')) is not None:
+                unit = _unit(spec.get('unitCode') or spec.get('unitText') or spec.get('billingDuration'))
+                if unit is None and isinstance(spec.get('referenceQuantity'), dict):
+                    unit = _unit(spec['referenceQuantity'].get('unitCode'))
+                return _number(spec['price']), spec.get('priceCurrency') or offer.get('priceCurrency'), unit
+        price = _number(offer.get('price', offer.get('lowPrice')))
+        if price is not None:
+            return price, offer.get('priceCurrency'), None
+    return None, None, None
+
+def _from_json_ld(node: Dict) -> Optional[Dict[str, Any]]:
+    """Oferta plana a partir de un Product/Car/... de schema.org"""
+    if not set(_types(node)) & PRODUCT_TYPES:
+        return None
+    price, currency, unit = _offer_price(node.get('offers', []))
+    name = _text(node.get('name'))
+    if not name or not price or price <= 0:
+        return None
+    return {
+        'name': name,
+        'brand': _text(node.get('brand') or node.get('manufacturer')),
+        'model': _text(node.get('model')),
+        'description': _text(node.get('description')),
+        'price': price,
+        'currency': currency or 'DKK',
+        'unit': unit,
+        'url': _text(node.get('url')),
+        'source': 'json-ld'
+    }
+
+def _first(node: Dict, keys) -> Tuple[Optional[str], Any]:
+    for key in keys:
+        if key in node and node[key] not in (None, ''):
+            return key, node[key]
+    return None, None
+
+def _from_app_state(node: Dict) -> Optional[Dict[str, Any]]:
+    """Oferta plana a partir de un objeto del estado de hidratación (nombre + precio)"""
+    _, name = _first(node, NAME_KEYS)
+    price_key, price = _first(node, PRICE_KEYS)
+    # Precio 0 o nulo: opciones incluidas (color, llantas), no ofertas
+    if not isinstance(name, str) or not _number(price) or _number(price) <= 0:
+        return None
+    _, down_payment = _first(node, DOWN_PAYMENT_KEYS)
+    _, term = _first(node, TERM_KEYS)
+    _, km = _first(node, KM_KEYS)
+    return {
+        'name': name.strip(),
+        'brand': _text(node.get('brand') or node.get('make')),
+        'model': _text(node.get('model')),
+        'description': _text(node.get('description')),
+        'price': _number(price),
+        'currency': node.get('currency') or 'DKK',
+        'unit': 'month' if price_key in MONTHLY_PRICE_KEYS else _unit(node.get('priceUnit')),
+        'url': _text(node.get('url')),
+        'down_payment': _number(down_payment),
+        'term_months': _number(term),
+        'km_per_year': _number(km),
+        'source': '__NEXT_DATA__'
+    }
+
+def _loads(raw: bytes, encoding: Optional[str]):
+    try:
+        return json.loads(raw.decode(encoding or 'utf-8', errors='replace'))
+    except (LookupError, ValueError):
+        return None
+
+def find_offers(body: bytes, encoding: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Ofertas en JSON-LD y __NEXT_DATA__ de una página, sin parsear el HTML"""
+    offers = []
+    for raw in _JSON_LD.findall(body):
+        data = _loads(raw, encoding)
+        for node in _walk(data):
+            offer = _from_json_ld(node)
+            if offer:
+                offers.append(offer)
+
+    # El estado de la app solo si no hay JSON-LD utilizable
+    if not offers:
+        match = _NEXT_DATA.search(body)
+        data = _loads(match.group(1), encoding) if match else None
+        pending = [data]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, dict):
+                offer = _from_json_ld(node) if '@type' in node else _from_app_state(node)
+                if offer:
+                    offers.append(offer)
+                    continue  # Sin bajar a sus hijos: serían la misma oferta
+                pending.extend(reversed(list(node.values())))
+            elif isinstance(node, list):
+                pending.extend(reversed(node))
+
+    # La misma oferta puede aparecer en varios bloques
+    unique = {}
+    for offer in offers:
+        unique.setdefault((offer['name'], offer['price']), offer)
+    return list(unique.values())
+
+def periodic_offers(offers: List[Dict[str, Any]], units: Sequence[str] = ('month',)) -> List[Dict[str, Any]]:
+    """Ofertas en DKK con periodicidad explícita: sin unidad, el precio es de compra o de una opción"""
+    return [
+        offer for offer in offers
+        if offer['unit'] in units and str(offer['currency']).upper() == 'DKK'
+    ]
@@ -0,0 +1,90 @@
+"""Tests de los planes de extracción declarativos"""
+
+import os
+import sys
+
+import pytest
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import ExtractionPlan, plan_version
+
+CONFIG = {
+    'container': {'tags': ['div', 'section'], 'class': 'product'},
+    'selectors': {
+        'name': {'select': '.name', 'required': True},
+        'price': {'select': '.price', 'extract': r'(\d[\d.]*)\s*kr', 'number': True, 'required': True},
+        'term': {'select': '.term', 'extract': r'(\d+)\s*mdr', 'number': True}
+    }
+}
+
+# Envoltorio > lista > tarjetas, todos con 'product' en la clase
+NESTED = '''
+<section class="product-list">
+  <div class="product-grid">
+    <div class="product-card"><div class="product-image"></div>
+      <span class="name">Tesla Model 3</span><span class="price">3.995 kr</span><span class="term">36 mdr</span>
+    </div>
+    <div class="product-card">
+      <span class="name">Tesla Model Y</span><span class="price">4.495 kr</span><span class="term">36 mdr</span>
+    </div>
+  </div>
+</section>
+'''
+
+def run(config, html):
+    plan = ExtractionPlan('test', config, plan_version(config))
+    return plan.run(BeautifulSoup(html, 'html.parser'))
+
+def test_innermost_extracts_each_card_once():
+    items = run(CONFIG, NESTED)
+    assert [(item['name'], item['price']) for item in items] == [
+        ('Tesla Model 3', 3995), ('Tesla Model Y', 4495)
+    ]
+
+def test_outermost_extracts_only_the_wrapper():
+    config = dict(CONFIG, container=dict(CONFIG['container'], nesting='outermost'))
+    items = run(config, NESTED)
+    # El envoltorio da un solo registro con los primeros valores que encuentra
+    assert [(item['name'], item['price']) for item in items] == [('Tesla Model 3', 3995)]
+
+def test_container_without_required_fields_does_not_hide_its_parent():
+    # La imagen (sin nombre ni precio) no cubre a la tarjeta que la contiene
+    html = '''<div class="product-card"><div class="product-image"><img></div>
+        <span class="name">VW ID.3</span><span class="price">2.995 kr</span></div>'''
+    assert [item['name'] for item in run(CONFIG, html)] == ['VW ID.3']
+
+@pytest.mark.parametrize('price, term, expected', [
+    ('3.995 kr', '36 mdr', 1),  # Tarjeta repetida (carrusel + lista): un solo registro
+    ('4.295 kr', '36 mdr', 2),  # Mismo modelo con otra cuota: otra oferta
+    ('3.995 kr', '48 mdr', 2),  # Mismo modelo con otro plazo: otra oferta
+])
+def test_dedupe_defaults_to_every_extracted_field(price, term, expected):
+    card = '<div class="product-card"><span class="name">Tesla Model 3</span>' \
+           '<span class="price">{}</span><span class="term">{}</span></div>'
+    html = card.format('3.995 kr', '36 mdr') + card.format(price, term)
+    assert len(run(CONFIG, html)) == expected
+
+def test_declared_key_dedupes_on_those_fields_only():
+    config = dict(CONFIG, key=['name'])
+    html = ''.join(
+        f'<div class="product-card"><span class="name">Tesla Model 3</span><span class="price">{price}</span></div>'
+        for price in ('3.995 kr', '4.295 kr')
+    )
+    assert [item['price'] for item in run(config, html)] == [3995]
+
+def test_wrappers_of_accepted_cards_are_never_extracted(monkeypatch):
+    # 300 tarjetas dentro de 3 envoltorios: sin poda, cada envoltorio recorrería todas otra vez
+    cards = ''.join(
+        f'<div class="product-card"><span class="name">Model {i}</span><span class="price">{1000 + i} kr</span></div>'
+        for i in range(300)
+    )
+    html = f'<div class="product-a"><div class="product-b"><div class="product-c">{cards}</div></div></div>'
+    calls = []
+    extract = ExtractionPlan._extract
+    monkeypatch.setattr(ExtractionPlan, '_extract', lambda self, container: calls.append(1) or extract(self, container))
+    items = run(CONFIG, html)
+    assert len(items) == 300
+    assert items[0]['name'] == 'Model 0' and items[-1]['price'] == 1299
+    assert len(calls) == 300
@@ -0,0 +1,245 @@
+"""Tests de la capa de fetch contra un servidor aiohttp local"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main_scraper import EthicalScraper, ScrapingConfig
+
+PAGE = b'<html><body><div class="product">GF Kasko 549 kr/md</div></body></html>'
+
+@pytest.fixture
+def make_config(tmp_path):
+    def make(**overrides):
+        # Sin esperas: ritmo alto, jitter proporcional a ese ritmo y reintentos inmediatos
+        settings = dict(
+            max_requests_per_second=1000,
+            adaptive_rate_limit=True,
+            adaptive_max_rps=1000,
+            retry_delay=0,
+            respect_robots_txt=False,
+            parse_workers=0,
+            use_parse_cache=False,
+            cache_dir=str(tmp_path / 'http_cache'),
+            robots_cache_path=str(tmp_path / 'robots_cache.json'),
+            rate_state_path=str(tmp_path / 'rate_state.json'),
+            parse_cache_dir=str(tmp_path / 'parse_cache')
+        )
+        settings.update(overrides)
+        return ScrapingConfig(**settings)
+    return make
+
+class Site:
+    """Servidor local con rutas de prueba que cuenta las peticiones recibidas"""
+
+    def __init__(self):
+        self.app = web.Application()
+        self.hits = {}
+        self.requests = []
+
+    def route(self, path: str, handler):
+        async def counted(request):
+            self.hits[path] = self.hits.get(path, 0) + 1
+            self.requests.append(request)
+            return await handler(request)
+        self.app.router.add_get(path, counted)
+
+    def run(self, scenario):
+        """Arranca el servidor, ejecuta scenario(base_url) y lo para"""
+        async def main():
+            runner = web.AppRunner(self.app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            host, port = runner.addresses[0][:2]
+            try:
+                return await scenario(f"http://{host}:{port}")
+            finally:
+                await runner.cleanup()
+        return asyncio.run(main())
+
+async def fetch(config, url):
+    async with EthicalScraper(config) as scraper:
+        page = await scraper.fetch_bytes(url)
+        return scraper, page
+
+def validated_page(etag='"v1"'):
+    async def handler(request):
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(body=PAGE, content_type='text/html', charset='utf-8', headers={'ETag': etag})
+    return handler
+
+def test_fresh_disk_entry_is_served_without_request(make_config):
+    site = Site()
+    site.route('/bil', validated_page())
+
+    async def scenario(base):
+        await fetch(make_config(), f"{base}/bil")
+        # Siguiente ejecución (memoria vacía) dentro de cache_duration_hours
+        return await fetch(make_config(), f"{base}/bil")
+
+    scraper, page = site.run(scenario)
+    assert page.body == PAGE
+    assert site.hits['/bil'] == 1
+    assert scraper.http_cache.stats['hits'] == 1
+
+def test_expired_entry_is_revalidated_with_conditional_get(make_config):
+    site = Site()
+    site.route('/bil', validated_page())
+
+    async def scenario(base):
+        await fetch(make_config(cache_duration_hours=0), f"{base}/bil")
+        return await fetch(make_config(cache_duration_hours=0), f"{base}/bil")
+
+    scraper, page = site.run(scenario)
+    assert page.body == PAGE
+    assert site.hits['/bil'] == 2
+    assert site.requests[-1].headers['If-None-Match'] == '"v1"'
+    assert scraper.http_cache.stats == {'hits': 0, 'misses': 0, 'revalidated': 1}
+
+def test_revalidate_disk_cache_sends_conditional_get_inside_window(make_config):
+    site = Site()
+    site.route('/bil', validated_page())
+
+    async def scenario(base):
+        await fetch(make_config(), f"{base}/bil")
+        return await fetch(make_config(revalidate_disk_cache=True), f"{base}/bil")
+
+    scraper, page = site.run(scenario)
+    assert page.body == PAGE
+    assert site.hits['/bil'] == 2
+    assert scraper.http_cache.stats['revalidated'] == 1
+
+def robots(text, status=200):
+    async def handler(request):
+        return web.Response(text=text, status=status)
+    return handler
+
+def page(body=PAGE, status=200, headers=None, delay=0.0):
+    async def handler(request):
+        if delay:
+            await asyncio.sleep(delay)
+        return web.Response(body=body, status=status, headers=headers, content_type='text/html')
+    return handler
+
+def test_robots_disallow_skips_page_and_is_loaded_once(make_config):
+    site = Site()
+    site.route('/robots.txt', robots("User-agent: *\nDisallow: /privat\n"))
+    site.route('/bil', page())
+    site.route('/privat', page())
+
+    async def scenario(base):
+        async with EthicalScraper(make_config(respect_robots_txt=True)) as scraper:
+            allowed = await scraper.fetch_bytes(f"{base}/bil")
+            blocked = await scraper.fetch_bytes(f"{base}/privat")
+            return allowed, blocked
+
+    allowed, blocked = site.run(scenario)
+    assert allowed.body == PAGE
+    assert blocked is None
+    assert site.hits == {'/robots.txt': 1, '/bil': 1}
+
+def test_robots_server_error_is_not_refetched_for_every_page(make_config):
+    site = Site()
+    site.route('/robots.txt', robots('', status=500))
+    for path in ('/a', '/b', '/c'):
+        site.route(path, page())
+
+    async def scenario(base):
+        async with EthicalScraper(make_config(respect_robots_txt=True)) as scraper:
+            return [await scraper.fetch_bytes(f"{base}{path}") for path in ('/a', '/b', '/c')]
+
+    pages = site.run(scenario)
+    # Como RobotFileParser.read(): un 5xx no autoriza nada, y la decisión dura unos minutos
+    assert pages == [None, None, None]
+    assert site.hits == {'/robots.txt': 1}
+
+def test_concurrent_requests_for_same_url_are_coalesced(make_config):
+    site = Site()
+    site.route('/bil', page(delay=0.2))
+
+    async def scenario(base):
+        async with EthicalScraper(make_config(use_disk_cache=False)) as scraper:
+            pages = await asyncio.gather(*(scraper.fetch_bytes(f"{base}/bil") for _ in range(3)))
+            return scraper, pages
+
+    scraper, pages = site.run(scenario)
+    assert [page.body for page in pages] == [PAGE] * 3
+    assert site.hits['/bil'] == 1
+    assert scraper.coalesced_requests == 2
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_oversized_response_is_rejected_without_retry(make_config, chunked):
+    site = Site()
+    body = b'x' * 4096
+
+    async def handler(request):
+        if not chunked:
+            return web.Response(body=body)
+        response = web.StreamResponse()
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for _ in range(4):
+            await response.write(body[:1024])
+        return response
+
+    site.route('/stor', handler)
+
+    async def scenario(base):
+        config = make_config(use_disk_cache=False, max_response_bytes=1024, stream_chunk_size=256)
+        return await fetch(config, f"{base}/stor")
+
+    _, result = site.run(scenario)
+    assert result is None
+    assert site.hits['/stor'] == 1
+
+def test_retry_after_is_honoured_before_retrying(make_config):
+    site = Site()
+    responses = [web.Response(status=503, headers={'Retry-After': '0'}), None]
+
+    async def handler(request):
+        return responses.pop(0) or web.Response(body=PAGE, content_type='text/html')
+
+    site.route('/bil', handler)
+
+    async def scenario(base):
+        return await fetch(make_config(use_disk_cache=False), f"{base}/bil")
+
+    _, result = site.run(scenario)
+    assert result.body == PAGE
+    assert site.hits['/bil'] == 2
+
+def test_retry_after_above_limit_gives_up(make_config):
+    site = Site()
+    site.route('/bil', page(status=429, headers={'Retry-After': '3600'}))
+
+    async def scenario(base):
+        return await fetch(make_config(use_disk_cache=False, max_retry_after=120), f"{base}/bil")
+
+    _, result = site.run(scenario)
+    assert result is None
+    assert site.hits['/bil'] == 1
+
+def test_circuit_breaker_stops_requests_to_failing_host(make_config):
+    site = Site()
+    site.route('/a', page(status=500))
+    site.route('/b', page())
+
+    async def scenario(base):
+        config = make_config(use_disk_cache=False, circuit_breaker_threshold=2, max_retries=3)
+        async with EthicalScraper(config) as scraper:
+            first = await scraper.fetch_bytes(f"{base}/a")
+            second = await scraper.fetch_bytes(f"{base}/b")
+            return scraper, first, second
+
+    scraper, first, second = site.run(scenario)
+    assert first is None and second is None
+    # Dos fallos abren el circuito: ni más reintentos ni peticiones al resto del host
+    assert site.hits == {'/a': 2}
+    assert scraper.circuit_breaker.short_circuited == 2
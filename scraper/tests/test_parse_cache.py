@@ -0,0 +1,122 @@
+"""Tests de la cache de extracción: cuándo se reutilizan los registros de una página"""
+
+import asyncio
+import copy
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bilforsikring_scraper import BilforsikringScraper, InsuranceData
+from main_scraper import EthicalScraper, FetchResult, ScrapingConfig
+from parse_cache import content_hash, hamming, simhash
+
+# Sin productos reconocibles: el target devuelve sus datos genéricos (fallback)
+EMPTY_PAGE = b'<html><body><p>Bilforsikring hos GF</p></body></html>'
+
+def product_page(price='399', banner='Velkommen', nonce='a1', structured_price=None) -> bytes:
+    structured = ''
+    if structured_price is not None:
+        structured = (
+            '<script type="application/ld+json">{"@type": "Product", "name": "GF Kasko", "offers": '
+            f'{{"priceSpecification": {{"price": {structured_price}, "priceCurrency": "DKK", "unitText": "md"}}}}}}'
+            '</script>'
+        )
+    return f'''<html><head><script nonce="{nonce}">var t = 1;</script>{structured}</head><body>
+        <header><p>{banner}</p></header>
+        <div class="product"><h3 class="product-name">GF Ansvar</h3><span class="price">{price} kr/md</span></div>
+        <div class="product"><h3 class="product-name">GF Kasko</h3><span class="price">549 kr/md</span></div>
+        <footer><p>Kontakt os</p></footer>
+    </body></html>'''.encode('utf-8')
+
+@pytest.fixture
+def scraper(tmp_path):
+    config = ScrapingConfig(
+        parse_workers=0,
+        use_disk_cache=False,
+        cache_dir=str(tmp_path / 'http_cache'),
+        parse_cache_dir=str(tmp_path / 'parse_cache'),
+        robots_cache_path=str(tmp_path / 'robots_cache.json'),
+        rate_state_path=str(tmp_path / 'rate_state.json')
+    )
+    return EthicalScraper(config)
+
+def parse(scraper, provider, config, body):
+    page = FetchResult(config['url'], body, 'utf-8')
+    return asyncio.run(scraper.parse_page(
+        provider, config, page, InsuranceData,
+        BilforsikringScraper.extract_products, BilforsikringScraper.structured_products
+    ))
+
+def test_target_changes_invalidate_cached_records(scraper):
+    target = copy.deepcopy(BilforsikringScraper(None).targets['gf'])
+    first = parse(scraper, 'gf', target, EMPTY_PAGE)
+    assert [(p.udbyder, p.pris_mdr) for p in first] == [('GF Forsikring', '399 kr./md')]
+
+    target['udbyder'] = 'GF Forsikring NEW'
+    target['fallback'][0]['pris_mdr_kr'] = 449
+    second = parse(scraper, 'gf', target, EMPTY_PAGE)
+    assert [(p.udbyder, p.pris_mdr) for p in second] == [('GF Forsikring NEW', '449 kr./md')]
+    assert scraper.parse_cache.stats['hits'] == 0
+
+def test_unchanged_page_and_target_reuse_records(scraper):
+    target = BilforsikringScraper(None).targets['gf']
+    parse(scraper, 'gf', target, EMPTY_PAGE)
+    again = parse(scraper, 'gf', target, EMPTY_PAGE)
+    assert [p.pris_mdr_kr for p in again] == [399]
+    assert scraper.parse_cache.stats['hits'] == 1
+
+def test_boilerplate_change_reuses_records(scraper):
+    target = BilforsikringScraper(None).targets['gf']
+    parse(scraper, 'gf', target, product_page())
+    again = parse(scraper, 'gf', target, product_page(banner='Spar i dag', nonce='b2'))
+    assert [p.pris_mdr_kr for p in again] == [399, 549]
+    assert scraper.parse_cache.stats['near_duplicates'] == 1
+
+@pytest.mark.parametrize('changed', [
+    {'price': '409'},
+    {'price': '3 995'},
+    {'price': '399,50'},
+])
+def test_price_change_is_never_served_from_cache(scraper, changed):
+    # Aunque el simhash admitiera cualquier distancia, un precio distinto obliga a re-extraer
+    scraper.config.near_duplicate_max_distance = 64
+    target = BilforsikringScraper(None).targets['gf']
+    parse(scraper, 'gf', target, product_page())
+    again = parse(scraper, 'gf', target, product_page(**changed))
+    assert scraper.parse_cache.stats['near_duplicates'] == 0
+    assert again[0].pris_mdr != '399 kr./md'
+
+def test_structured_price_change_is_never_served_from_cache(scraper):
+    scraper.config.near_duplicate_max_distance = 64
+    target = BilforsikringScraper(None).targets['gf']
+    first = parse(scraper, 'gf', target, product_page(structured_price=549))
+    again = parse(scraper, 'gf', target, product_page(structured_price=579))
+    assert [p.pris_mdr_kr for p in first] == [549]
+    assert [p.pris_mdr_kr for p in again] == [579]
+    assert scraper.parse_cache.stats['near_duplicates'] == 0
+
+def test_volatile_tokens_do_not_change_content_hash():
+    first = b'<meta name="csrf-token" content="abc"><script nonce="n1" src="/app.js?v=12"></script>' \
+            b'<p>Opdateret 2026-10-16T03:00:01Z</p><p>GF Kasko 549 kr</p>'
+    second = b'<meta name="csrf-token" content="xyz"><script nonce="n2" src="/app.js?v=13"></script>' \
+             b'<p>Opdateret 2026-10-17T03:00:02Z</p><p>GF Kasko 549 kr</p>'
+    assert content_hash(first) == content_hash(second)
+    assert content_hash(first) != content_hash(first.replace(b'549', b'579'))
+
+def test_simhash_separates_boilerplate_from_new_content():
+    words = ' '.join(f"ord{i}" for i in range(400))
+    base = simhash(words)
+    assert hamming(f"{base:016x}", f"{simhash(words + ' nyhed'):016x}") <= 3
+    assert hamming(f"{base:016x}", f"{simhash(' '.join(reversed(words.split()))):016x}") > 3
+
+def test_near_duplicate_needs_same_plan_version(scraper):
+    target = BilforsikringScraper(None).targets['gf']
+    parse(scraper, 'gf', target, product_page())
+    changed = copy.deepcopy(target)
+    changed['reliability_score'] = 0.5
+    again = parse(scraper, 'gf', changed, product_page(banner='Spar i dag'))
+    assert scraper.parse_cache.stats['near_duplicates'] == 0
+    assert [p.reliability_score for p in again] == [0.5, 0.5]
@@ -0,0 +1,57 @@
+"""Tests del pool de procesos de parseo"""
+
+import asyncio
+import os
+import sys
+import time
+from dataclasses import asdict
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bilforsikring_scraper import BilforsikringScraper
+from extraction import extract_page
+from parse_pool import ParsePool, ParseTimeoutError
+
+PAGE = b'''<html><body>
+    <div class="product"><h3 class="product-name">GF Ansvar</h3><span class="price">399 kr/md</span></div>
+    <div class="product"><h3 class="product-name">GF Kasko</h3><span class="price">549 kr/md</span></div>
+</body></html>'''
+
+def without_dates(records):
+    """Registros como dicts sin la fecha de extracción"""
+    return [dict(asdict(record), last_updated=None) for record in records]
+
+def test_pool_extraction_matches_inline():
+    target = BilforsikringScraper(None).targets['gf']
+    args = (BilforsikringScraper.extract_products, BilforsikringScraper.structured_products,
+            'gf', target, PAGE, 'utf-8', 'html.parser')
+
+    async def main():
+        pool = ParsePool(1, timeout=30)
+        try:
+            return await pool.run(extract_page, *args)
+        finally:
+            pool.close()
+
+    pooled, _ = asyncio.run(main())
+    inline, _ = extract_page(*args)
+    assert [(p.produkt, p.pris_mdr_kr) for p in pooled] == [('GF Ansvar', 399), ('GF Kasko', 549)]
+    assert without_dates(pooled) == without_dates(inline)
+
+def test_hung_worker_is_killed_and_replaced():
+    async def main():
+        pool = ParsePool(1, timeout=0.5)
+        try:
+            with pytest.raises(ParseTimeoutError):
+                await pool.run(time.sleep, 30)
+            # El slot sustituido sigue atendiendo tareas
+            result = await pool.run(sum, [1, 2, 3])
+            return pool.stats, result
+        finally:
+            pool.close()
+
+    stats, result = asyncio.run(main())
+    assert result == 6
+    assert stats == {'tasks': 2, 'timeouts': 1, 'crashes': 0}
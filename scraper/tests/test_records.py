@@ -0,0 +1,39 @@
+"""Tests de las utilidades de registros (números en formato danés)"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import format_kr, parse_danish_number
+
+@pytest.mark.parametrize('text, expected', [
+    ('3.995 kr./md', 3995),
+    ('Fra 3 995 kr', 3995),
+    ('Fra 3\u00a0995 kr', 3995),
+    ('3\u202f995 kr', 3995),
+    ('1 234 567 kr', 1234567),
+    ('12.500,50 kr', 12500.5),
+    ('12 500,50 kr', 12500.5),
+    ('399,50 kr', 399.5),
+    ('2,5%', 2.5),
+    ('2.5', 2.5),
+    ('15.000 km/år', 15000),
+    ('36 mdr', 36),
+    ('Model 3 2024', 3),
+    (4295.0, 4295),
+    ('På anmodning', None),
+    (None, None),
+])
+def test_parse_danish_number(text, expected):
+    assert parse_danish_number(text) == expected
+
+@pytest.mark.parametrize('value, expected', [
+    (3995, '3.995'),
+    (399.5, '399,50'),
+    (1234567, '1.234.567'),
+])
+def test_format_kr(value, expected):
+    assert format_kr(value) == expected
@@ -0,0 +1,110 @@
+"""Tests de las ofertas en JSON-LD y __NEXT_DATA__ y de los registros que producen"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bilforsikring_scraper import BilforsikringScraper
+from leasing_scraper import LeasingScraper
+from structured_data import _number, find_offers
+
+def json_ld_page(*nodes) -> bytes:
+    scripts = ''.join(
+        f'<script type="application/ld+json">{json.dumps(node)}</script>' for node in nodes
+    )
+    return f'<html><head>{scripts}</head><body></body></html>'.encode('utf-8')
+
+def next_data_page(state) -> bytes:
+    return (
+        '<html><body><script id="__NEXT_DATA__" type="application/json">'
+        f'{json.dumps(state)}</script></body></html>'
+    ).encode('utf-8')
+
+CASH_CAR = {
+    '@type': 'Car',
+    'name': 'Tesla Model 3 Long Range',
+    'offers': {'@type': 'Offer', 'price': 349990, 'priceCurrency': 'DKK'}
+}
+
+MONTHLY_CAR = {
+    '@type': 'Car',
+    'name': 'Tesla Model 3 Long Range',
+    'offers': {
+        '@type': 'Offer',
+        'priceSpecification': {
+            '@type': 'UnitPriceSpecification',
+            'price': '4.995 kr.',
+            'priceCurrency': 'DKK',
+            'unitCode': 'MON'
+        }
+    }
+}
+
+CONFIGURATOR_STATE = {
+    'props': {'pageProps': {
+        'trims': [{'name': 'Model 3 Long Range', 'price': 349990}],
+        'paint': [
+            {'name': 'Pearl White', 'price': 0},
+            {'name': 'Ultra Red', 'price': 16000}
+        ],
+        'wheels': [{'name': '19" Nova', 'price': '12.000'}]
+    }}
+}
+
+@pytest.fixture
+def tesla():
+    return LeasingScraper(None).targets['tesla']
+
+@pytest.mark.parametrize('value, expected', [
+    (3995, 3995.0),
+    ('3995.00', 3995.0),
+    ('1.299,00', 1299.0),
+    ('4.995 kr.', 4995.0),
+    ({'amount': '3 995'}, 3995.0),
+    ('På anmodning', None),
+    (True, None),
+])
+def test_number_parses_danish_prices(value, expected):
+    assert _number(value) == expected
+
+def test_cash_price_is_not_a_monthly_offer(tesla):
+    offers = find_offers(json_ld_page(CASH_CAR))
+    assert [(offer['price'], offer['unit']) for offer in offers] == [(349990.0, None)]
+    assert LeasingScraper.structured_vehicles(offers, tesla) == []
+
+def test_option_prices_are_not_vehicles(tesla):
+    offers = find_offers(next_data_page(CONFIGURATOR_STATE))
+    # Las opciones de precio 0 ni siquiera son ofertas
+    assert 'Pearl White' not in [offer['name'] for offer in offers]
+    assert LeasingScraper.structured_vehicles(offers, tesla) == []
+
+def test_monthly_json_ld_offer_becomes_vehicle(tesla):
+    offers = find_offers(json_ld_page(CASH_CAR, MONTHLY_CAR))
+    vehicles = LeasingScraper.structured_vehicles(offers, tesla)
+    assert len(vehicles) == 1
+    vehicle = vehicles[0]
+    assert (vehicle.mærke, vehicle.model, vehicle.variant) == ('Tesla', 'Model 3', 'Long Range')
+    assert vehicle.pris_mdr_kr == 4995
+    assert vehicle.pris_mdr == '4.995 kr./md'
+
+def test_foreign_currency_is_ignored(tesla):
+    euro = json.loads(json.dumps(MONTHLY_CAR))
+    euro['offers']['priceSpecification']['priceCurrency'] = 'EUR'
+    assert LeasingScraper.structured_vehicles(find_offers(json_ld_page(euro)), tesla) == []
+
+def test_insurance_needs_an_explicit_period():
+    target = BilforsikringScraper(None).targets['tryg']
+    one_off = {'@type': 'Product', 'name': 'Bilforsikring', 'offers': {'price': 2500, 'priceCurrency': 'DKK'}}
+    yearly = {
+        '@type': 'Product',
+        'name': 'Bilforsikring Plus',
+        'offers': {'priceSpecification': {'price': 4800, 'priceCurrency': 'DKK', 'unitText': 'år'}}
+    }
+    products = BilforsikringScraper.structured_products(find_offers(json_ld_page(one_off, yearly)), target)
+    assert [(product.produkt, product.pris_mdr_kr, product.pris_år_kr) for product in products] == [
+        ('Bilforsikring Plus', 400, 4800)
+    ]
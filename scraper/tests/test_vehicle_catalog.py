@@ -0,0 +1,22 @@
+"""Tests del catálogo de marcas y modelos"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vehicle_catalog import get_catalog
+
+@pytest.mark.parametrize('name, brand, model, variant', [
+    ('VW ID.4 Pro', 'Volkswagen', 'ID.4', 'Pro'),
+    ('Land Rover Defender 110', 'Land Rover', 'Defender', '110'),
+    ('Lynk & Co 01 Hybrid', 'Lynk & Co', '01', 'Hybrid'),
+    ('Lynk&Co 02', 'Lynk & Co', '02', None),
+    ('Lynk and Co 08 Core', 'Lynk & Co', '08', 'Core'),
+])
+def test_parse_multi_word_brands(name, brand, model, variant):
+    match = get_catalog().parse(name)
+    assert (match.brand, match.model, match.variant) == (brand, model, variant)
+    assert match.model_id is not None
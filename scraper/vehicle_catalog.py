@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+🚙 Catálogo de marcas y modelos
+Índice por tokens (trie) construido una sola vez por proceso: normaliza alias
+(VW, Mercedes, Citroen), reconoce el modelo más largo que encaja y deja el
+resto del nombre como variante, con IDs canónicos estables
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Marca canónica -> alias y modelos conocidos (con sus alias)
+CATALOG: Dict[str, Dict] = {
+    'Tesla': {'models': ['Model 3', 'Model Y', 'Model S', 'Model X', 'Cybertruck']},
+    'Volkswagen': {
+        'aliases': ['VW'],
+        'models': ['ID.3', 'ID.4', 'ID.5', 'ID.7', 'ID. Buzz', 'e-Up!', 'Golf', 'Polo', 'Passat', 'Tiguan',
+                   'T-Roc', 'T-Cross', 'Taigo', 'Touran', 'Arteon'],
+        'model_aliases': {'ID. Buzz': ['Buzz'], 'e-Up!': ['eUp', 'e-Up']}
+    },
+    'BMW': {'models': ['i3', 'i4', 'i5', 'i7', 'iX', 'iX1', 'iX2', 'iX3', '1-serie', '2-serie', '3-serie',
+                       '5-serie', 'X1', 'X3', 'X5']},
+    'Mercedes-Benz': {
+        'aliases': ['Mercedes', 'Mercedes Benz', 'MB'],
+        'models': ['EQA', 'EQB', 'EQC', 'EQE', 'EQS', 'A-Klasse', 'B-Klasse', 'C-Klasse', 'E-Klasse', 'GLA',
+                   'GLB', 'GLC'],
+        'model_aliases': {'A-Klasse': ['A-Class'], 'B-Klasse': ['B-Class'], 'C-Klasse': ['C-Class'],
+                          'E-Klasse': ['E-Class']}
+    },
+    'Audi': {'models': ['Q4 e-tron', 'Q4 Sportback e-tron', 'Q8 e-tron', 'e-tron GT', 'e-tron', 'A1', 'A3',
+                        'A4', 'A6', 'Q2', 'Q3', 'Q5']},
+    'Toyota': {'models': ['Yaris Hybrid', 'Yaris Cross', 'Yaris', 'Corolla Touring Sports', 'Corolla',
+                          'C-HR', 'RAV4', 'bZ4X', 'Aygo X', 'Prius']},
+    'Honda': {'models': ['e:Ny1', 'Honda e', 'Jazz', 'Civic', 'HR-V', 'ZR-V', 'CR-V'],
+              'model_aliases': {'Honda e': ['e']}},
+    'Nissan': {'models': ['Leaf', 'Ariya', 'Juke', 'Qashqai', 'X-Trail', 'Micra']},
+    'Kia': {'models': ['EV3', 'EV6', 'EV9', 'e-Niro', 'Niro', 'Picanto', 'Ceed', 'Sportage', 'Soul EV']},
+    'Hyundai': {'models': ['Ioniq 5', 'Ioniq 6', 'Ioniq', 'Kona Electric', 'Kona', 'i10', 'i20', 'i30',
+                           'Tucson', 'Inster']},
+    'Ford': {'models': ['Mustang Mach-E', 'Explorer', 'Capri', 'Puma', 'Kuga', 'Focus', 'Fiesta']},
+    'Peugeot': {'models': ['e-208', 'e-2008', 'e-308', 'e-3008', '208', '2008', '308', '3008']},
+    'Renault': {'models': ['Megane E-Tech', 'Scenic E-Tech', 'Zoe', 'Clio', 'Captur', 'Austral', 'R5']},
+    'Citroën': {
+        'aliases': ['Citroen'],
+        'models': ['ë-C4', 'ë-C3', 'ë-Berlingo', 'C3', 'C4', 'C5 Aircross', 'Berlingo'],
+        'model_aliases': {'ë-C4': ['C4 Electric'], 'ë-C3': ['C3 Electric']}
+    },
+    'Opel': {'models': ['Corsa-e', 'Mokka-e', 'Astra', 'Corsa', 'Mokka', 'Grandland']},
+    'Skoda': {'aliases': ['Škoda'], 'models': ['Enyaq iV', 'Enyaq', 'Elroq', 'Octavia', 'Fabia', 'Kamiq',
+                                                'Karoq', 'Kodiaq', 'Superb']},
+    'Seat': {'models': ['Ibiza', 'Leon', 'Arona', 'Ateca']},
+    'Cupra': {'models': ['Born', 'Tavascan', 'Formentor', 'Leon']},
+    'Volvo': {'models': ['EX30', 'EX40', 'EX90', 'XC40 Recharge', 'C40 Recharge', 'XC40', 'XC60', 'XC90',
+                         'V60', 'V90']},
+    'Polestar': {'models': ['Polestar 2', 'Polestar 3', 'Polestar 4'],
+                 'model_aliases': {'Polestar 2': ['2'], 'Polestar 3': ['3'], 'Polestar 4': ['4']}},
+    'Lynk & Co': {'aliases': ['LynkCo'], 'models': ['01', '02', '08']},
+    'MG': {'aliases': ['MG Motor'], 'models': ['MG4', 'MG5', 'ZS EV', 'Marvel R', 'Cyberster'],
+           'model_aliases': {'MG4': ['4'], 'MG5': ['5']}},
+    'BYD': {'models': ['Atto 3', 'Dolphin', 'Seal U', 'Seal', 'Han', 'Tang']},
+    'Mazda': {'models': ['MX-30', 'CX-30', 'CX-60', 'Mazda2', 'Mazda3']},
+    'Fiat': {'models': ['500e', '600e', '500', 'Panda']},
+    'Dacia': {'models': ['Spring', 'Sandero', 'Duster', 'Jogger']},
+    'Suzuki': {'models': ['Swift', 'Vitara', 'S-Cross', 'Ignis']},
+    'Lexus': {'models': ['UX 300e', 'RZ', 'UX', 'NX', 'RX']},
+    'Porsche': {'models': ['Taycan', 'Macan', 'Cayenne']},
+    'Mini': {'aliases': ['MINI'], 'models': ['Cooper SE', 'Countryman', 'Aceman', 'Cooper']},
+    'Smart': {'models': ['#1', '#3', 'ForTwo']},
+    'Subaru': {'models': ['Solterra', 'Forester', 'Outback']},
+    'Jeep': {'models': ['Avenger', 'Compass', 'Renegade']},
+    'Land Rover': {'aliases': ['Range Rover'], 'models': ['Defender', 'Discovery', 'Evoque', 'Velar']},
+    'Jaguar': {'models': ['I-Pace', 'E-Pace', 'F-Pace']},
+}
+
+# Separadores entre tokens; el resto de la puntuación (ID.4, e:Ny1) se quita al normalizar.
+# '&' es siempre un token propio: 'Lynk&Co', 'Lynk & Co' y 'Lynk and Co' dan la misma ruta
+_TOKEN = re.compile(r"&|[^\s\-/_,()|&]+")
+_PUNCTUATION = re.compile(r"[.:'!´`’]")
+
+def normalize_token(token: str) -> str:
+    """'ë' -> 'e', 'ID.4' -> 'id4', '&' -> 'and': minúsculas, sin diacríticos ni puntuación interna"""
+    if token == '&':
+        return 'and'
+    decomposed = unicodedata.normalize('NFKD', token)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _PUNCTUATION.sub('', stripped.lower())
+
+def tokenize(text: str) -> List[Tuple[str, int]]:
+    """(token normalizado, posición final en el texto original) de cada token"""
+    tokens = []
+    for match in _TOKEN.finditer(text):
+        token = normalize_token(match.group())
+        if token:
+            tokens.append((token, match.end()))
+    return tokens
+
+def slug(text: str) -> str:
+    """ID estable de un nombre: 'Mercedes-Benz' -> 'mercedes-benz', 'ID.4' -> 'id4'"""
+    return '-'.join(token for token, _ in tokenize(text))
+
+@dataclass(frozen=True)
+class VehicleMatch:
+    """Marca, modelo y variante canónicos de un nombre de vehículo"""
+    brand: str
+    model: str
+    variant: Optional[str] = None
+    brand_id: Optional[str] = None  # None si la marca no está en el catálogo
+    model_id: Optional[str] = None  # None si el modelo no está en el catálogo
+
+class _TokenTrie:
+    """Trie sobre secuencias de tokens con búsqueda del prefijo más largo"""
+
+    _VALUE = object()
+
+    def __init__(self):
+        self.root: Dict = {}
+
+    def insert(self, tokens: Sequence[str], value) -> None:
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(self._VALUE, value)
+
+    def longest(self, tokens: Sequence[str], start: int = 0) -> Tuple[Optional[object], int]:
+        """(valor, índice siguiente) del prefijo más largo desde `start`, o (None, start)"""
+        node, found, end = self.root, None, start
+        for position in range(start, len(tokens)):
+            node = node.get(tokens[position])
+            if node is None:
+                break
+            if self._VALUE in node:
+                found, end = node[self._VALUE], position + 1
+        return found, end
+
+class VehicleCatalog:
+    """Índice de marcas y modelos para reconocer nombres de vehículos"""
+
+    def __init__(self, catalog: Dict[str, Dict]):
+        # Un trie de marcas (con alias) y uno de modelos por marca
+        self.brands = _TokenTrie()
+        self.models: Dict[str, _TokenTrie] = {}
+        # Modelos reconocibles sin marca ('Model 3', 'ID.4'); los ambiguos se descartan
+        self.standalone = _TokenTrie()
+        standalone: Dict[Tuple[str, ...], set] = {}
+
+        for brand, entry in catalog.items():
+            brand_id = slug(brand)
+            for name in [brand] + entry.get('aliases', []):
+                self.brands.insert([token for token, _ in tokenize(name)], (brand, brand_id))
+            models = self.models[brand_id] = _TokenTrie()
+            model_aliases = entry.get('model_aliases', {})
+            for model in entry.get('models', []):
+                value = (brand, brand_id, model, f"{brand_id}/{slug(model)}")
+                for name in [model] + model_aliases.get(model, []):
+                    tokens = tuple(token for token, _ in tokenize(name))
+                    models.insert(tokens, value)
+                    if name == model:
+                        standalone.setdefault(tokens, set()).add(value)
+
+        for tokens, values in standalone.items():
+            # Un solo token numérico ('500', '3') no basta para adivinar la marca
+            if len(values) == 1 and not (len(tokens) == 1 and tokens[0].isdigit()):
+                self.standalone.insert(tokens, next(iter(values)))
+
+    @staticmethod
+    def _rest(text: str, tokens: List[Tuple[str, int]], index: int) -> str:
+        """Texto original a partir del token `index`, sin separadores sueltos"""
+        offset = tokens[index - 1][1] if index else 0
+        return ' '.join(text[offset:].split()).strip(' -/,|')
+
+    def parse(self, name: str, brand_hint: Optional[str] = None) -> VehicleMatch:
+        """Marca, modelo y variante de un nombre como 'VW ID.4 Pro' o 'Mercedes EQA 250'"""
+        text = ' '.join((name or '').split())
+        tokens = tokenize(text)
+        keys = [token for token, _ in tokens]
+
+        brand, index = self.brands.longest(keys)
+        if brand is None and brand_hint:
+            # Nombre sin marca ('Model 3 Long Range') pero con la marca en otro campo
+            hinted, _ = self.brands.longest([token for token, _ in tokenize(brand_hint)])
+            if hinted is not None:
+                brand = hinted
+        if brand is not None:
+            brand_name, brand_id = brand
+            model, end = self.models[brand_id].longest(keys, index)
+            if model is not None:
+                return VehicleMatch(brand_name, model[2], self._rest(text, tokens, end) or None, brand_id, model[3])
+            return VehicleMatch(brand_name, self._rest(text, tokens, index), None, brand_id)
+
+        model, end = self.standalone.longest(keys)
+        if model is not None:
+            brand_name, brand_id, model_name, model_id = model
+            return VehicleMatch(brand_name, model_name, self._rest(text, tokens, end) or None, brand_id, model_id)
+
+        # Marca desconocida: la de brand_hint (quitándola del nombre) o la primera palabra
+        if brand_hint:
+            hint = ' '.join(brand_hint.split())
+            hint_tokens = [token for token, _ in tokenize(hint)]
+            if hint_tokens and keys[:len(hint_tokens)] == hint_tokens:
+                return VehicleMatch(hint, self._rest(text, tokens, len(hint_tokens)))
+            return VehicleMatch(hint, text)
+        parts = text.split(maxsplit=1)
+        return VehicleMatch(parts[0] if parts else '', parts[1] if len(parts) > 1 else '')
+
+# Índice compartido: se construye la primera vez que se usa en cada proceso
+_CATALOG: Optional[VehicleCatalog] = None
+
+def get_catalog() -> VehicleCatalog:
+    """Catálogo por defecto, construido una sola vez por proceso"""
+    global _CATALOG
+    if _CATALOG is None:
+        _CATALOG = VehicleCatalog(CATALOG)
+    return _CATALOG
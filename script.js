@@ -30,7 +30,7 @@ function getTilvalgIcon(tilvalg) {
 // Load and display bilforsikring data
 async function loadBilforsikringData() {
     try {
-        const response = await fetch('bilforsikring.json');
+        const response = await fetch('bilforsikring.min.json');
         const jsonData = await response.json();
         
         // Handle both old format (array) and new format (object with data property)
@@ -88,7 +88,7 @@ function getCarBrandLogo(brand) {
 // Load and display leasing data
 async function loadLeasingData() {
     try {
-        const response = await fetch('leasing.json');
+        const response = await fetch('leasing.min.json');
         const jsonData = await response.json();
         
         // Handle both old format (array) and new format (object with data property)